@@ -0,0 +1,173 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+# Generates synthetic markdown corpora to benchmark md2ipynb offline.
+#
+#   python benchmarks/corpus.py /tmp/corpus --pages 100
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from md2ipynb.read import github_sample
+
+CLASSES = ['language-py', 'shell-sh', 'language-java', 'note']
+GITHUB_SAMPLE_PATH = '/owner/repo/blob/main/samples/sample_{}.py'
+
+
+def generate_corpus(
+    directory,
+    pages=10,
+    sections=20,
+    paragraphs=5,
+    code_lines=20,
+    class_density=0.5,
+    include_depth=3,
+    captures=1,
+    github_samples=1,
+    seed=0,
+):
+  # Writes the pages into `directory/pages` and a chain of `include_depth`
+  # nested includes into `directory/includes`, returns the page paths.
+  # Pages are only valid with `directory` as the include directory.
+  rng = random.Random(seed)
+  os.makedirs(os.path.join(directory, 'pages'), exist_ok=True)
+  os.makedirs(os.path.join(directory, 'includes'), exist_ok=True)
+
+  for i in range(include_depth):
+    nested = ''
+    if i + 1 < include_depth:
+      nested = '\n\n{{% include includes/include_{}.md %}}'.format(i + 1)
+    write(os.path.join(directory, 'includes', 'include_{}.md'.format(i)),
+          'Included text at depth {}.{}'.format(i, nested))
+
+  paths = []
+  for page in range(pages):
+    path = os.path.join(directory, 'pages', 'page_{}.md'.format(page))
+    write(path, generate_page(
+        rng, page, sections, paragraphs, code_lines, class_density,
+        include_depth, captures, github_samples))
+    paths.append(path)
+  return paths
+
+
+def generate_page(rng, page, sections, paragraphs, code_lines, class_density,
+                  include_depth, captures, github_samples):
+  blocks = ['# Page {}'.format(page)]
+  for section in range(sections):
+    blocks.append('## Section {}.{}'.format(page, section))
+    for paragraph in range(paragraphs):
+      lines = [text(rng) for _ in range(rng.randint(1, 4))]
+      if rng.random() < class_density:
+        lines.append('{{: .{}}}'.format(rng.choice(CLASSES)))
+      blocks.append('\n'.join(lines))
+
+    if code_lines:
+      code = ['def function_{}_{}():'.format(page, section)]
+      code.extend('  x = {}  # {}'.format(i, text(rng)) for i in range(code_lines))
+      lang = rng.choice(['py', 'sh', 'java'])
+      attributes = '{{: .{}}}\n'.format(rng.choice(CLASSES))
+      if rng.random() >= class_density:
+        attributes = ''
+      blocks.append('{}```{}\n{}\n```'.format(attributes, lang, '\n'.join(code)))
+
+    for capture in range(captures):
+      name = 'var_{}_{}'.format(section, capture)
+      blocks.append('{{% capture {} %}}{}{{% endcapture %}}\n{{{{ {} }}}}'.format(
+          name, text(rng), name))
+
+    if include_depth:
+      blocks.append('{% include includes/include_0.md %}')
+
+    for sample in range(github_samples):
+      blocks.append('```py\n{{% github_sample {} tag:tag_{} %}}\n```'.format(
+          GITHUB_SAMPLE_PATH.format(sample), section % 10))
+  return '\n\n'.join(blocks) + '\n'
+
+
+def text(rng):
+  words = ['the', 'pipeline', 'reads', '`data`', 'from', 'a', 'source',
+           'and', 'writes', '**results**', 'to', 'sink', 'with', 'some']
+  return ' '.join(rng.choice(words) for _ in range(rng.randint(5, 15))) + '.'
+
+
+def stub_github_samples(count=1):
+  # Fills the github_sample download cache, so nothing is downloaded.
+  for sample in range(count):
+    lines = []
+    for tag in range(10):
+      lines.append('# [START tag_{}]'.format(tag))
+      lines.extend('print({})'.format(i) for i in range(10))
+      lines.append('# [END tag_{}]'.format(tag))
+    owner, repo, _, branch, path = GITHUB_SAMPLE_PATH.format(sample)[1:].split('/', 4)
+    url = github_sample.github_url(owner, repo, branch, path)
+    github_sample.github_file_cache[url] = '\n'.join(lines)
+
+
+def write(path, contents):
+  with open(path, 'w') as f:
+    f.write(contents)
+
+
+def add_arguments(parser):
+  parser.add_argument('--pages', type=int, default=10)
+  parser.add_argument('--sections', type=int, default=20)
+  parser.add_argument('--paragraphs', type=int, default=5,
+                      help='Text paragraphs per section.')
+  parser.add_argument('--code-lines', type=int, default=20,
+                      help='Lines of the code block of each section.')
+  parser.add_argument('--class-density', type=float, default=0.5,
+                      help='Fraction of paragraphs with a {: .class}.')
+  parser.add_argument('--include-depth', type=int, default=3,
+                      help='Nested includes in each section.')
+  parser.add_argument('--captures', type=int, default=1,
+                      help='Captures per section.')
+  parser.add_argument('--github-samples', type=int, default=1,
+                      help='Stubbed github_samples per section.')
+  parser.add_argument('--seed', type=int, default=0)
+
+
+def corpus_options(args):
+  return dict(
+      pages=args.pages,
+      sections=args.sections,
+      paragraphs=args.paragraphs,
+      code_lines=args.code_lines,
+      class_density=args.class_density,
+      include_depth=args.include_depth,
+      captures=args.captures,
+      github_samples=args.github_samples,
+      seed=args.seed,
+  )
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('directory')
+  add_arguments(parser)
+  args = parser.parse_args(argv)
+  paths = generate_corpus(args.directory, **corpus_options(args))
+  size_mb = sum(os.path.getsize(path) for path in paths) / (1024 * 1024)
+  print('Generated {} pages, {:.2f} MB in {}'.format(
+      len(paths), size_mb, args.directory))
+
+
+if __name__ == '__main__':
+  main()
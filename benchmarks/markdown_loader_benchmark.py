@@ -0,0 +1,78 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+# Measures the MarkdownLoader normalization on large generated pages.
+#
+#   python benchmarks/markdown_loader_benchmark.py --size-mb 4
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from md2ipynb.read import markdown_loader
+
+
+def generate_page(size):
+  section = '\n'.join([
+      '## Section {i}',
+      '',
+      '<!-- A comment that will be removed. -->',
+      'Some text with `inline code` and a <!-- inline comment --> in it.',
+      '',
+      '{{% capture var_{i} %}}Captured text {i}{{% endcapture %}}',
+      '{{% include templates/note.md title="Note {i}" body=var_{i} %}}',
+      '',
+      '{{: .language-py}}',
+      '```py',
+      'def function_{i}():',
+      '  return {i}',
+      '```',
+      '',
+      '```',
+      '{{% github_sample /owner/repo/blob/master/file.py tag:tag_{i} %}}```',
+      '',
+  ])
+  pieces = []
+  total = 0
+  i = 0
+  while total < size:
+    piece = section.format(i=i)
+    pieces.append(piece)
+    total += len(piece)
+    i += 1
+  return '\n'.join(pieces)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--size-mb', type=float, default=1)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args(argv)
+
+  source = generate_page(int(args.size_mb * 1024 * 1024))
+  size_mb = len(source) / (1024 * 1024)
+  seconds = min(timeit.repeat(
+      lambda: markdown_loader.normalize(source), number=1, repeat=args.repeat))
+  print('normalize: {:.2f} MB in {:.3f}s, {:.2f} MB/s'.format(
+      size_mb, seconds, size_mb / seconds))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,168 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+# Measures read.paragraphs against the line by line loop it replaced,
+# on large generated pages. The 'dense' page is mostly headers and short
+# code blocks, the 'prose' page is mostly multi-line text and longer code.
+#   scan: from the already rendered lines, or the text for read.paragraphs.
+#   file: from the page's file, including reading it with read.lines.
+#
+#   python benchmarks/paragraphs_benchmark.py --size-mb 4
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import timeit
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from md2ipynb import read
+from md2ipynb.util import attributes_re
+
+paragraphs_module = importlib.import_module('md2ipynb.read.paragraphs')
+
+SECTIONS = {
+    'dense': '\n'.join([
+        '## Section {i}',
+        '{{: .language-py}}',
+        '```py',
+        'x = {i}',
+        '```',
+        '### Output {i}',
+        '```',
+        '{i}',
+        '```',
+        '{{: .output}}',
+        '',
+    ]),
+    'prose': '\n'.join([
+        '## Section {i}',
+        '',
+        'Some text with `inline code` in it,',
+        'which goes on for a few lines',
+        'until the paragraph ends.',
+        '',
+        'A shorter paragraph with a class.',
+        '{{: .note}}',
+        '',
+        '```py',
+        '\n'.join('  x_{{i}}_{} = {}  # a comment'.format(j, j) for j in range(20)),
+        '```',
+        '',
+    ]),
+}
+
+
+def generate_lines(section, size):
+  lines = []
+  total = 0
+  i = 0
+  while total < size:
+    piece = section.format(i=i)
+    lines.extend(piece.splitlines())
+    total += len(piece) + 1
+    i += 1
+  return lines
+
+
+def line_by_line_paragraphs(lines):
+  # The line by line loop read.paragraphs used before the tokenizer.
+  is_paragraph_done = False
+  in_code_block = False
+  paragraph_lines = []
+  for raw_line in lines:
+    line = attributes_re.sub('', raw_line)
+    if is_paragraph_done:
+      is_paragraph_done = False
+      if paragraph_lines:
+        trailing_paragraph_class = raw_line and not line
+        if trailing_paragraph_class:
+          paragraph_lines.append(raw_line)
+        yield '\n'.join(paragraph_lines)
+        paragraph_lines = []
+        if trailing_paragraph_class:
+          continue
+    if in_code_block:
+      paragraph_lines.append(raw_line)
+      if line.startswith('```'):
+        in_code_block = False
+        is_paragraph_done = True
+    elif line.startswith('```') or line.startswith('#'):
+      in_code_block = line.startswith('```')
+      is_paragraph_done = not in_code_block
+      if len(paragraph_lines) == 1 and attributes_re.match(paragraph_lines[0]):
+        paragraph_lines.append(raw_line)
+      else:
+        if paragraph_lines:
+          yield '\n'.join(paragraph_lines)
+        paragraph_lines = [raw_line]
+    elif raw_line:
+      paragraph_lines.append(raw_line)
+    elif paragraph_lines:
+      yield '\n'.join(paragraph_lines)
+      paragraph_lines = []
+  if paragraph_lines:
+    yield '\n'.join(paragraph_lines)
+
+
+def from_text(input_file, *args):
+  return [input_file]
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--size-mb', type=float, default=4)
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args(argv)
+
+  def best_time(run):
+    return min(timeit.repeat(run, number=1, repeat=args.repeat))
+
+  print('{:<6} {:<5} {:>6} {:>11} {:>8} {:>8} {:>8}'.format(
+      'page', 'from', 'MB', 'paragraphs', 'old (s)', 'new (s)', 'speedup'))
+  with tempfile.TemporaryDirectory() as directory:
+    for name, section in sorted(SECTIONS.items()):
+      lines = generate_lines(section, int(args.size_mb * 1024 * 1024))
+      text = '\n'.join(lines)
+      path = os.path.join(directory, name + '.md')
+      with open(path, 'w') as f:
+        f.write(text)
+
+      expected = list(line_by_line_paragraphs(lines))
+      with patch.object(paragraphs_module, 'blocks', from_text):
+        if list(read.paragraphs(text)) != expected:
+          raise AssertionError('read.paragraphs differs on the {} page'.format(name))
+        scan = (
+            best_time(lambda: list(line_by_line_paragraphs(lines))),
+            best_time(lambda: list(read.paragraphs(text))),
+        )
+      from_file = (
+          best_time(lambda: list(line_by_line_paragraphs(read.lines(path)))),
+          best_time(lambda: list(read.paragraphs(path))),
+      )
+
+      size_mb = len(text) / (1024 * 1024)
+      for source, (old, new) in [('scan', scan), ('file', from_file)]:
+        print('{:<6} {:<5} {:>6.2f} {:>11} {:>8.3f} {:>8.3f} {:>7.1f}x'.format(
+            name, source, size_mb, len(expected), old, new, old / new))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,156 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+# Times every stage of the conversion independently on a generated corpus.
+# Each stage gets the already computed output of the previous stage,
+# so only the stage itself is measured. Runs offline, github samples
+# are stubbed.
+#
+#   python benchmarks/pipeline_benchmark.py --pages 50 --code-lines 200
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import timeit
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import nbformat
+
+import corpus
+import md2ipynb
+from md2ipynb import read
+from md2ipynb import steps
+
+paragraphs_module = importlib.import_module('md2ipynb.read.paragraphs')
+sections_module = importlib.import_module('md2ipynb.read.sections')
+
+
+def from_iterable(input_file, *args):
+  return iter(input_file)
+
+
+def from_text(input_file, *args):
+  return [input_file]
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser()
+  corpus.add_arguments(parser)
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args(argv)
+
+  with tempfile.TemporaryDirectory() as directory:
+    pages = corpus.generate_corpus(directory, **corpus.corpus_options(args))
+    corpus.stub_github_samples(args.github_samples)
+    import_file = os.path.join(directory, 'includes', 'import.md')
+    corpus.write(import_file, '## Imported section\n\nImported text.')
+    env = read.new_jinja_env(directory)
+
+    # Compute the input of every stage once.
+    lines = [list(read.lines(page, jinja_env=env)) for page in pages]
+    texts = ['\n'.join(page_lines) for page_lines in lines]
+    with patch.object(paragraphs_module, 'blocks', from_text):
+      paragraphs = [list(read.paragraphs(text)) for text in texts]
+    with patch.object(sections_module, 'paragraphs', from_iterable):
+      sections = [list(read.sections(page_paragraphs))
+                  for page_paragraphs in paragraphs]
+    flat_paragraphs = [list(steps.flatten(page_sections))
+                       for page_sections in sections]
+    filtered = [list(steps.filter_classes(page_paragraphs))
+                for page_paragraphs in flat_paragraphs]
+    cells = [list(steps.paragraphs_to_cells(page_paragraphs))
+             for page_paragraphs in filtered]
+    notebooks = [nbformat.v4.new_notebook(
+                     cells=[md2ipynb.cell.to_node(cell) for cell in page_cells])
+                 for page_cells in cells]
+
+    def run_lines():
+      for page in pages:
+        for _ in read.lines(page, jinja_env=env):
+          pass
+
+    def run_paragraphs():
+      with patch.object(paragraphs_module, 'blocks', from_text):
+        for text in texts:
+          for _ in read.paragraphs(text):
+            pass
+
+    def run_sections():
+      with patch.object(sections_module, 'paragraphs', from_iterable):
+        for page_paragraphs in paragraphs:
+          for _ in read.sections(page_paragraphs):
+            pass
+
+    def run_imports():
+      for page_sections in sections:
+        for _ in steps.imports(page_sections, {1: [import_file]}, jinja_env=env):
+          pass
+
+    def run_filter_classes():
+      for page_paragraphs in flat_paragraphs:
+        for _ in steps.filter_classes(page_paragraphs):
+          pass
+
+    def run_paragraphs_to_cells():
+      for page_paragraphs in filtered:
+        for _ in steps.paragraphs_to_cells(page_paragraphs):
+          pass
+
+    def run_serialize():
+      for notebook in notebooks:
+        nbformat.writes(notebook)
+
+    def run_fast_serialize():
+      validator = md2ipynb.serializer.Validator('never')
+      for notebook in notebooks:
+        md2ipynb.serializer.dumps(notebook, validator=validator)
+
+    def run_new_notebook():
+      for page in pages:
+        nbformat.writes(md2ipynb.new_notebook(page, jinja_env=env))
+
+    stages = [
+        ('read.lines', run_lines),
+        ('read.paragraphs', run_paragraphs),
+        ('read.sections', run_sections),
+        ('steps.imports', run_imports),
+        ('steps.filter_classes', run_filter_classes),
+        ('steps.paragraphs_to_cells', run_paragraphs_to_cells),
+        ('nbformat.writes', run_serialize),
+        ('serializer.dumps', run_fast_serialize),
+        ('total: new_notebook', run_new_notebook),
+    ]
+
+    size_mb = sum(os.path.getsize(page) for page in pages) / (1024 * 1024)
+    num_paragraphs = sum(len(page_paragraphs) for page_paragraphs in paragraphs)
+    print('Corpus: {} pages, {:.2f} MB, {} paragraphs'.format(
+        len(pages), size_mb, num_paragraphs))
+    print('{:<26} {:>9} {:>9} {:>14}'.format(
+        'stage', 'seconds', 'MB/s', 'paragraphs/s'))
+    for name, run in stages:
+      seconds = min(timeit.repeat(run, number=1, repeat=args.repeat))
+      seconds = max(seconds, 1e-9)
+      print('{:<26} {:>9.3f} {:>9.2f} {:>14.0f}'.format(
+          name, seconds, size_mb / seconds, num_paragraphs / seconds))
+
+
+if __name__ == '__main__':
+  main()
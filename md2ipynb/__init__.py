@@ -15,8 +15,23 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from .version import __version__
+
+from . import cell
 from . import read
 from . import steps
 from . import util
 from .apply import apply
+from .cell import Cell
+from .paragraph import Paragraph
+from .paragraph import Span
+from .pipeline import Pipeline
+from .profiler import Profiler
 from .new_notebook import new_notebook
+from .new_notebook import stream_notebook
+
+from . import batch
+from . import build_cache
+from . import serializer
+from .build_cache import BuildCache
+from . import watch
@@ -18,18 +18,31 @@
 # under the License.
 
 import argparse
-
-import nbformat
+import glob
 import os
+import sys
 
-from . import new_notebook
+from . import batch
+from . import build_cache
+from . import read
+from . import serializer
+from . import watch
+from .profiler import Profiler
 
 
 def main(argv=None):
   parser = argparse.ArgumentParser()
 
   # Required arguments.
-  parser.add_argument('input_file', help='Path to the markdown file to convert')
+  parser.add_argument(
+      'inputs',
+      metavar='input_file',
+      nargs='+',
+      help='Path to the markdown file to convert. '
+           'Multiple files, directories, glob patterns or "@manifest.txt" '
+           'files can be given to convert them all into --output-dir. '
+           'A manifest has one "input_file [output_file]" per line.',
+  )
 
   # Optional arguments.
   parser.add_argument(
@@ -37,6 +50,25 @@ def main(argv=None):
       help='Path of the output notebook to write.',
   )
 
+  parser.add_argument(
+      '--output-dir',
+      help='Directory to write the notebooks to when converting multiple '
+           'files, keeping the directory layout relative to each input.',
+  )
+
+  parser.add_argument(
+      '-j', '--jobs',
+      type=int,
+      default=1,
+      help='Number of worker processes to convert multiple files, '
+           'use 0 for one per CPU. Defaults to 1.',
+  )
+
+  parser.add_argument(
+      '--summary-file',
+      help='Path to write a JSON summary of all the conversions.',
+  )
+
   parser.add_argument(
       '--var',
       type=lambda value: value.split('=', 1),
@@ -58,7 +90,7 @@ def main(argv=None):
   parser.add_argument(
       '--include-dir',
       default='.',
-      help='Path to look for {% include file %} templates.',
+      help='Path to look for {%% include file %%} templates.',
   )
 
   parser.add_argument(
@@ -107,7 +139,165 @@ def main(argv=None):
       help='Notebook kernel to use, defaults to "python3".',
   )
 
-  args = parser.parse_args()
+  parser.add_argument(
+      '--github-cache-dir',
+      help='Directory to cache {%% github_sample %%} downloads across runs. '
+           'Cached files are revalidated with GitHub using their ETag.',
+  )
+
+  parser.add_argument(
+      '--github-cache-ttl',
+      type=float,
+      default=0,
+      help='Seconds to use a cached {%% github_sample %%} file before '
+           'revalidating it, defaults to always revalidate.',
+  )
+
+  parser.add_argument(
+      '--github-connect-timeout',
+      type=float,
+      default=read.http_session.DEFAULT_TIMEOUT[0],
+      help='Seconds to wait to connect to GitHub for a {%% github_sample %%}, '
+           'defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--github-read-timeout',
+      type=float,
+      default=read.http_session.DEFAULT_TIMEOUT[1],
+      help='Seconds to wait for GitHub to send a {%% github_sample %%} file, '
+           'defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--github-retries',
+      type=int,
+      default=read.http_session.DEFAULT_RETRIES,
+      help='Times to retry a failed {%% github_sample %%} download with a '
+           'capped exponential backoff, defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--bytecode-cache-dir',
+      help='Directory to cache the compiled templates across runs, '
+           'so unchanged pages and includes are not compiled again.',
+  )
+
+  parser.add_argument(
+      '--no-fast-path',
+      dest='fast_path',
+      action='store_false',
+      help='Always convert inputs through html2md and Jinja, '
+           'even if they have no HTML or template syntax.',
+  )
+
+  parser.add_argument(
+      '--build-cache-dir',
+      help='Directory to cache the converted notebooks across runs. '
+           'A notebook is only converted again if its page, includes, '
+           'imports, options or the md2ipynb version changed.',
+  )
+
+  parser.add_argument(
+      '--plan',
+      action='store_true',
+      help='Show which notebooks would be converted and why, '
+           'without converting them.',
+  )
+
+  parser.add_argument(
+      '--profile',
+      action='store_true',
+      help='Print the time spent on each conversion step and how many items '
+           'went in and out of it. Conversions run in a single process, '
+           'ignoring --jobs.',
+  )
+
+  parser.add_argument(
+      '--profile-output',
+      help='Path to write the cProfile stats of the conversions, '
+           'which can be loaded with pstats. Implies --profile.',
+  )
+
+  parser.add_argument(
+      '--depfile',
+      action='store_true',
+      help='Write a Make/Ninja depfile next to each notebook, '
+           'named like the notebook with a ".d" suffix, '
+           'listing the page, includes and imports it was built from.',
+  )
+
+  parser.add_argument(
+      '--depfile-urls',
+      action='store_true',
+      help='Also list the {%% github_sample %%} URLs in the depfiles as '
+           'comments. Make ignores them, but Ninja does not support comments.',
+  )
+
+  parser.add_argument(
+      '--watch',
+      action='store_true',
+      help='Keep running and reconvert a notebook whenever its page, '
+           'includes, imports or github samples change. '
+           'Conversions run in a single process, ignoring --jobs.',
+  )
+
+  parser.add_argument(
+      '--watch-interval',
+      type=float,
+      default=1.0,
+      help='Seconds between checks for changed files with --watch, '
+           'defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--watch-github-interval',
+      type=float,
+      help='Seconds between checks for changed {%% github_sample %%} files '
+           'with --watch, defaults to never check them again.',
+  )
+
+  parser.add_argument(
+      '--indent',
+      type=int,
+      default=1,
+      help='Spaces to indent the notebook JSON with, defaults to %(default)s '
+           'like nbformat.',
+  )
+
+  parser.add_argument(
+      '--compact',
+      action='store_true',
+      help='Write the notebook JSON in a single line, ignoring --indent.',
+  )
+
+  parser.add_argument(
+      '--validate',
+      choices=serializer.VALIDATE_MODES,
+      default='always',
+      help='When to validate the notebooks against the nbformat schema: '
+           '"always", only a "sample" of them, in the "background" while '
+           'writing the next ones, or "never". Invalid notebooks are '
+           'logged and still written. Defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--validate-sample-every',
+      type=int,
+      default=10,
+      help='With --validate sample, validate one of every N notebooks, '
+           'defaults to %(default)s.',
+  )
+
+  parser.add_argument(
+      '--always-write',
+      action='store_true',
+      help='Rewrite output notebooks even if their contents did not change. '
+           'By default they are left untouched, so their modification time '
+           'only changes when the notebook does.',
+  )
+
+  args = parser.parse_args(argv)
 
   try:
     variables = dict(args.var or [])
@@ -126,8 +316,7 @@ def main(argv=None):
     parser.error('imports must be in the format "path/to/file.md:index", '
                  'use --help for more information.')
 
-  notebook = new_notebook(
-      args.input_file,
+  kwargs = dict(
       variables=variables,
       imports=imports,
       include_dir=args.include_dir,
@@ -139,15 +328,91 @@ def main(argv=None):
       github_ipynb_url=args.github_ipynb_url,
       kernel=args.kernel,
   )
+  validator = serializer.Validator(args.validate, args.validate_sample_every)
+  kwargs['indent'] = None if args.compact else args.indent
+  kwargs['validator'] = validator
+  kwargs['always_write'] = args.always_write
+  profiler = None
+  if args.profile or args.profile_output:
+    profiler = Profiler(cprofile=bool(args.profile_output))
+    kwargs['profiler'] = profiler
+    args.jobs = 1
+  if args.build_cache_dir:
+    kwargs['build_cache'] = build_cache.BuildCache(args.build_cache_dir)
+  if args.depfile:
+    kwargs['depfile'] = True
+    kwargs['depfile_urls'] = args.depfile_urls
+
+  jinja_env_options = dict(
+      include_dir=args.include_dir,
+      github_timeout=(args.github_connect_timeout, args.github_read_timeout),
+      github_retries=args.github_retries,
+      bytecode_cache_dir=args.bytecode_cache_dir,
+      fast_path=args.fast_path,
+  )
+  if args.github_cache_dir:
+    jinja_env_options['github_cache'] = read.GithubCache(
+        args.github_cache_dir, args.github_cache_ttl)
+
+  is_batch = args.output_dir or len(args.inputs) > 1 or any(
+      pattern.startswith('@') or os.path.isdir(pattern) or glob.has_magic(pattern)
+      for pattern in args.inputs)
+  if not is_batch:
+    jobs = [(args.inputs[0], args.output_file)]
+  else:
+    if args.output_file:
+      parser.error('--output_file can only be used with a single input file, '
+                   'use --output-dir for multiple files.')
+    try:
+      jobs = batch.find_inputs(args.inputs, args.output_dir)
+    except (IOError, ValueError) as e:
+      parser.error(str(e))
+    if any(output_file is None for _, output_file in jobs):
+      parser.error('--output-dir is required when converting multiple files.')
+
+  if args.depfile and any(output_file is None for _, output_file in jobs):
+    parser.error('--depfile requires an --output_file or --output-dir.')
+
+  if args.plan:
+    jinja_env = read.new_jinja_env(**jinja_env_options)
+    results = build_cache.plan(jobs, jinja_env=jinja_env, **kwargs)
+    for input_file, output_file, reason in results:
+      print('{:<10} {} -> {}{}'.format(
+          'rebuild' if reason else 'up-to-date',
+          input_file,
+          output_file or '<stdout>',
+          ' ({})'.format(reason) if reason else ''))
+    print('{} of {} notebooks would be converted.'.format(
+        sum(1 for _, _, reason in results if reason), len(results)))
+    return
 
-  if args.output_file:
-    output_dir = os.path.dirname(args.output_file)
-    if not os.path.exists(output_dir):
-      os.makedirs(output_dir)
-    with open(args.output_file, 'w') as f:
-      nbformat.write(notebook, f)
+  if args.watch:
+    jinja_env = read.new_jinja_env(**jinja_env_options)
+    watcher = watch.Watcher(
+        jobs, jinja_env, args.watch_github_interval, **kwargs)
+    watcher.run(args.watch_interval)
+    return
+
+  if not is_batch:
+    jinja_env = read.new_jinja_env(**jinja_env_options)
+    changed = batch.convert(
+        args.inputs[0], args.output_file, jinja_env=jinja_env, **kwargs)
+    if args.output_file:
+      print('{}: {}'.format(
+          args.output_file, 'written' if changed else 'unchanged'),
+          file=sys.stderr)
+    results = []
   else:
-    print(nbformat.writes(notebook))
+    results = batch.convert_all(jobs, args.jobs, jinja_env_options, **kwargs)
+    batch.write_summary(results, args.summary_file)
+  validator.wait()
+
+  if profiler:
+    profiler.print_stats()
+    if args.profile_output:
+      profiler.dump_stats(args.profile_output)
+  if any(result.error for result in results):
+    sys.exit(1)
 
 
 if __name__ == '__main__':
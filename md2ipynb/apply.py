@@ -16,13 +16,9 @@
 # under the License.
 
 
-def apply(inputs, steps=None):
-  while steps:
-    step = steps.pop(0)
-    if callable(step):
-      fn = step
-      args = []
-    else:
-      fn, *args = step
-    inputs = fn(inputs, *args)
-  return list(inputs)
+from .pipeline import Pipeline
+
+
+def apply(inputs, steps=None, profiler=None):
+  # Like Pipeline(steps).run(inputs), the steps list is not modified.
+  return Pipeline(steps).run(inputs, profiler)
@@ -65,3 +65,8 @@ class ApplyTest(unittest.TestCase):
         steps=[lowercase, (remove, 'hello')],
     ))
     self.assertEqual(expected, actual)
+
+  def test_apply_keeps_steps(self):
+    steps = [lowercase, (remove, 'hello')]
+    apply(['Hello'], steps)
+    self.assertEqual([lowercase, (remove, 'hello')], steps)
@@ -0,0 +1,223 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import concurrent.futures
+import glob
+import json
+import logging
+import os
+import sys
+import traceback
+
+from . import read
+from . import stream_notebook
+from . import util
+from .read import dependencies
+
+# `changed` is whether the output file was written, or None if it failed.
+Result = collections.namedtuple(
+    'Result', ['input_file', 'output_file', 'error', 'changed'],
+    defaults=[None])
+
+
+def find_inputs(patterns, output_dir=None, extensions=('.md',)):
+  # Each pattern can be a file, a directory, a glob or a '@manifest' file.
+  # Returns a list of (input_file, output_file) pairs.
+  jobs = []
+  for pattern in patterns:
+    if pattern.startswith('@'):
+      jobs.extend(read_manifest(pattern[1:], output_dir))
+    elif os.path.isdir(pattern):
+      for root, dirs, files in os.walk(pattern):
+        dirs.sort()
+        for name in sorted(files):
+          if name.endswith(tuple(extensions)):
+            input_file = os.path.join(root, name)
+            jobs.append((input_file, output_path(input_file, pattern, output_dir)))
+    elif glob.has_magic(pattern):
+      base = glob_base(pattern)
+      for input_file in sorted(glob.glob(pattern, recursive=True)):
+        if os.path.isfile(input_file):
+          jobs.append((input_file, output_path(input_file, base, output_dir)))
+    else:
+      base = os.path.dirname(pattern)
+      jobs.append((pattern, output_path(pattern, base, output_dir)))
+
+  # Remove duplicate inputs, keeping the first occurrence.
+  seen = set()
+  unique_jobs = []
+  for input_file, output_file in jobs:
+    key = os.path.normpath(input_file)
+    if key not in seen:
+      seen.add(key)
+      unique_jobs.append((input_file, output_file))
+
+  # Different inputs must not overwrite each other's output file,
+  # like 'a/hello.md' and 'b/hello.md' both going to 'hello.ipynb'.
+  outputs = {}
+  for input_file, output_file in unique_jobs:
+    if output_file is None:
+      continue
+    key = os.path.normpath(output_file)
+    if key in outputs:
+      raise ValueError('{} and {} would both be written to {}, convert them '
+                       'separately or list them in a @manifest file with '
+                       'their output files'.format(
+                           outputs[key], input_file, output_file))
+    outputs[key] = input_file
+  return unique_jobs
+
+
+def read_manifest(manifest_file, output_dir=None):
+  # Format: one "input_file [output_file]" per line, '#' starts a comment.
+  jobs = []
+  with open(manifest_file) as f:
+    for line in f:
+      line = line.split('#', 1)[0].strip()
+      if not line:
+        continue
+      parts = line.split()
+      if len(parts) > 2:
+        raise ValueError('{}: invalid manifest line {}, expected '
+                         '"input_file [output_file]"'.format(
+                             manifest_file, repr(line)))
+      input_file = parts[0]
+      if len(parts) == 2:
+        output_file = parts[1]
+      else:
+        output_file = output_path(input_file, '', output_dir)
+      jobs.append((input_file, output_file))
+  return jobs
+
+
+def glob_base(pattern):
+  parts = []
+  for part in pattern.split(os.sep):
+    if glob.has_magic(part):
+      break
+    parts.append(part)
+  return os.sep.join(parts)
+
+
+def output_path(input_file, base, output_dir):
+  if output_dir is None:
+    return None
+  relative_path = os.path.relpath(input_file, base or os.curdir)
+  if relative_path.startswith(os.pardir):
+    relative_path = os.path.basename(input_file)
+  return os.path.join(output_dir, os.path.splitext(relative_path)[0] + '.ipynb')
+
+
+def convert(input_file, output_file=None, depfile=False, depfile_urls=False,
+            indent=1, validator=None, always_write=False, **kwargs):
+  # The notebook is written as the cells are converted. A failed conversion
+  # doesn't leave a partially written output file, and an output file that
+  # already has the same contents is left untouched unless `always_write`.
+  # Returns whether the output file was written.
+  if depfile and not output_file:
+    raise ValueError('an output file is required to write a depfile')
+
+  # Write a Make depfile next to the notebook with all the files it used.
+  with dependencies.record() as notebook_dependencies:
+    dependencies.add_file(input_file)
+    if output_file:
+      with util.open_atomic(output_file, not always_write) as f:
+        stream_notebook(input_file, f, indent, validator, output_file, **kwargs)
+      changed = f.changed
+    else:
+      stream_notebook(input_file, sys.stdout, indent, validator, '<stdout>', **kwargs)
+      changed = True
+  if depfile:
+    util.write_atomic(
+        output_file + '.d',
+        dependencies.depfile(output_file, notebook_dependencies, depfile_urls),
+        not always_write)
+  return changed
+
+
+# Options shared by all the conversions in a worker process,
+# including a Jinja environment that is reused across files.
+_worker_kwargs = {}
+
+
+def _init_worker(kwargs, jinja_env_options=None):
+  global _worker_kwargs
+  _worker_kwargs = dict(kwargs)
+  if not _worker_kwargs.get('jinja_env'):
+    jinja_env_options = dict(jinja_env_options or {})
+    jinja_env_options.setdefault('include_dir', kwargs.get('include_dir'))
+    _worker_kwargs['jinja_env'] = read.new_jinja_env(**jinja_env_options)
+
+
+def _convert_job(job):
+  input_file, output_file = job
+  try:
+    changed = convert(input_file, output_file, **_worker_kwargs)
+    return Result(input_file, output_file, None, changed)
+  except Exception:
+    return Result(input_file, output_file, traceback.format_exc())
+
+
+def convert_all(jobs, num_jobs=1, jinja_env_options=None, **kwargs):
+  if num_jobs is None or num_jobs < 1:
+    num_jobs = os.cpu_count() or 1
+  jobs = list(jobs)
+
+  if num_jobs == 1 or len(jobs) <= 1:
+    _init_worker(kwargs, jinja_env_options)
+    results = map(_convert_job, jobs)
+    return _report(results)
+
+  kwargs = {name: value for name, value in kwargs.items() if name != 'jinja_env'}
+  with concurrent.futures.ProcessPoolExecutor(
+      max_workers=num_jobs,
+      initializer=_init_worker,
+      initargs=(kwargs, jinja_env_options)) as executor:
+    return _report(executor.map(_convert_job, jobs))
+
+
+def _report(results):
+  reported = []
+  for result in results:
+    if result.error:
+      logging.error('failed to convert {}:\n{}'.format(
+          result.input_file, result.error))
+    reported.append(result)
+  return reported
+
+
+def write_summary(results, summary_file=None, f=None):
+  failed = [result for result in results if result.error]
+  f = f or sys.stderr
+  changed = [result for result in results if result.changed]
+  print('Converted {} of {} files, {} failed, {} changed.'.format(
+      len(results) - len(failed), len(results), len(failed), len(changed)),
+      file=f)
+  for result in failed:
+    error = result.error.strip().splitlines()[-1]
+    print('  {}: {}'.format(result.input_file, error), file=f)
+
+  if summary_file:
+    with open(summary_file, 'w') as summary:
+      json.dump({
+          'total': len(results),
+          'converted': len(results) - len(failed),
+          'failed': len(failed),
+          'changed': len(changed),
+          'results': [result._asdict() for result in results],
+      }, summary, indent=2)
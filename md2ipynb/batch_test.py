@@ -0,0 +1,150 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from . import batch
+
+
+class FindInputsTest(unittest.TestCase):
+  def test_find_inputs_files(self):
+    expected = [
+        ('test/paragraphs.md', os.path.join('out', 'paragraphs.ipynb')),
+        ('test/title.md', os.path.join('out', 'title.ipynb')),
+    ]
+    actual = batch.find_inputs(
+        ['test/paragraphs.md', 'test/title.md', 'test/paragraphs.md'], 'out')
+    self.assertEqual(expected, actual)
+
+  def test_find_inputs_same_output(self):
+    with self.assertRaisesRegex(ValueError, 'a/page.md and b/page.md'):
+      batch.find_inputs(['a/page.md', 'a/other.md', 'b/page.md'], 'out')
+    # Without an output directory, each file has its own output.
+    self.assertEqual(2, len(batch.find_inputs(['a/page.md', 'b/page.md'])))
+
+  def test_find_inputs_directory(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      os.makedirs(os.path.join(temp_dir, 'a', 'b'))
+      for path in ['x.md', 'a/y.md', 'a/b/z.md', 'a/ignored.txt']:
+        with open(os.path.join(temp_dir, path), 'w') as f:
+          f.write('# Title')
+      expected = [
+          (os.path.join(temp_dir, 'x.md'), os.path.join('out', 'x.ipynb')),
+          (os.path.join(temp_dir, 'a', 'y.md'), os.path.join('out', 'a', 'y.ipynb')),
+          (os.path.join(temp_dir, 'a', 'b', 'z.md'),
+           os.path.join('out', 'a', 'b', 'z.ipynb')),
+      ]
+      actual = batch.find_inputs([temp_dir], 'out')
+      self.assertEqual(sorted(expected), sorted(actual))
+
+  def test_find_inputs_glob(self):
+    expected = [
+        ('test/classes-leading-line.md', os.path.join('out', 'classes-leading-line.ipynb')),
+        ('test/classes-leading.md', os.path.join('out', 'classes-leading.ipynb')),
+    ]
+    actual = batch.find_inputs(['test/classes-leading*.md'], 'out')
+    self.assertEqual(expected, actual)
+
+  def test_find_inputs_manifest(self):
+    with tempfile.NamedTemporaryFile('w') as f:
+      f.write('\n'.join([
+          '# Comment',
+          'test/title.md',
+          'test/paragraphs.md other/paragraphs.ipynb  # Custom output',
+      ]))
+      f.flush()
+      expected = [
+          ('test/title.md', os.path.join('out', 'test', 'title.ipynb')),
+          ('test/paragraphs.md', 'other/paragraphs.ipynb'),
+      ]
+      actual = batch.find_inputs(['@' + f.name], 'out')
+    self.assertEqual(expected, actual)
+
+
+class ConvertAllTest(unittest.TestCase):
+  def test_convert_all(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      jobs = [
+          ('test/paragraphs.md', os.path.join(temp_dir, 'paragraphs.ipynb')),
+          ('test/non-existent-file.md', os.path.join(temp_dir, 'missing.ipynb')),
+          ('test/title.md', os.path.join(temp_dir, 'nested', 'title.ipynb')),
+      ]
+      results = batch.convert_all(jobs, num_jobs=2)
+      self.assertEqual(
+          [(result.input_file, result.output_file) for result in results],
+          jobs)
+      self.assertIsNone(results[0].error)
+      self.assertIsNotNone(results[1].error)
+      self.assertIsNone(results[2].error)
+      self.assertTrue(os.path.exists(jobs[0][1]))
+      self.assertFalse(os.path.exists(jobs[1][1]))
+      self.assertTrue(os.path.exists(jobs[2][1]))
+
+      summary_file = os.path.join(temp_dir, 'summary.json')
+      with open(os.devnull, 'w') as devnull:
+        batch.write_summary(results, summary_file, devnull)
+      with open(summary_file) as f:
+        summary = json.load(f)
+      self.assertEqual(3, summary['total'])
+      self.assertEqual(2, summary['converted'])
+      self.assertEqual(1, summary['failed'])
+      self.assertEqual(2, summary['changed'])
+
+      # Converting them again doesn't change anything.
+      results = batch.convert_all(jobs, num_jobs=2)
+      self.assertEqual([False, None, False],
+                       [result.changed for result in results])
+
+
+class ConvertTest(unittest.TestCase):
+  def test_convert_depfile(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      input_file = os.path.join(temp_dir, 'page.md')
+      with open(input_file, 'w') as f:
+        f.write('{% include "include-static.md" %}')
+      output_file = os.path.join(temp_dir, 'page.ipynb')
+      batch.convert(
+          input_file, output_file, depfile=True, include_dir='test',
+          imports={0: ['test/title.md']})
+      with open(output_file + '.d') as f:
+        depfile = f.read()
+    expected = '\n'.join([
+        output_file + ': ' + input_file + ' \\',
+        '  test/include-static.md \\',
+        '  test/title.md',
+        '',
+    ])
+    self.assertEqual(expected, depfile)
+
+  def test_convert_unchanged(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      output_file = os.path.join(temp_dir, 'title.ipynb')
+      self.assertTrue(batch.convert('test/title.md', output_file))
+      with open(output_file) as f:
+        expected = f.read()
+      os.utime(output_file, (0, 0))
+
+      self.assertFalse(batch.convert('test/title.md', output_file))
+      self.assertEqual(0, os.path.getmtime(output_file))
+      self.assertTrue(
+          batch.convert('test/title.md', output_file, always_write=True))
+      self.assertNotEqual(0, os.path.getmtime(output_file))
+      with open(output_file) as f:
+        self.assertEqual(expected, f.read())
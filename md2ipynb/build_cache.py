@@ -0,0 +1,139 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import json
+import os
+
+from . import util
+from .version import __version__
+
+# Arguments of new_notebook() that change the resulting notebook,
+# with their default values.
+OPTIONS = {
+    'variables': None,
+    'imports': None,
+    'include_dir': None,
+    'notebook_title': None,
+    'keep_classes': None,
+    'filter_classes': None,
+    'shell': None,
+    'docs_url': None,
+    'docs_logo_url': None,
+    'github_ipynb_url': None,
+    'kernel': 'python3',
+    'fast_path': True,
+}
+
+
+class BuildCache(object):
+  # On-disk cache of converted notebooks, shared across runs and processes.
+  # Entries are keyed by a fingerprint of the input file, the conversion
+  # options and the md2ipynb version. Each entry records the contents hash
+  # of every file read during the conversion, like includes and imports,
+  # so it's only used while none of them changed.
+  #
+  # Remote github samples are not checked, a notebook is only rebuilt
+  # when one of its local files changes.
+  def __init__(self, directory):
+    self.directory = directory
+
+  def key(self, input_file, jinja_env=None, **options):
+    if jinja_env is not None:
+      options['fast_path'] = getattr(jinja_env.loader, 'fast_path', True)
+    fingerprint = json.dumps({
+        'version': __version__,
+        'input_file': os.path.abspath(input_file),
+        'options': {name: options.get(name, default)
+                    for name, default in OPTIONS.items()},
+    }, sort_keys=True, default=repr)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+  def check(self, key):
+    # Returns the entry and the files that changed since it was stored,
+    # or (None, None) if there's no entry.
+    try:
+      with open(self._entry_path(key), encoding='utf-8') as f:
+        entry = json.load(f)
+    except (IOError, ValueError):
+      return None, None
+    changed = [path for path, stat in sorted(entry['files'].items())
+               if not unchanged(path, stat)]
+    return entry, changed
+
+  def get(self, key):
+    entry, changed = self.check(key)
+    if entry is None or changed:
+      return None
+    return entry
+
+  def put(self, key, dependencies, notebook):
+    entry = {
+        'files': {path: file_stat(path) for path in dependencies.files},
+        'urls': dependencies.urls,
+        'notebook': notebook,
+    }
+    util.write_atomic(self._entry_path(key), json.dumps(entry, sort_keys=True))
+
+  def _entry_path(self, key):
+    return os.path.join(self.directory, key[:2], key + '.json')
+
+
+def file_stat(path):
+  # Returns [mtime_ns, size, sha256] of a file, or None if it doesn't exist.
+  try:
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+      sha256 = hashlib.sha256(f.read()).hexdigest()
+  except OSError:
+    return None
+  return [stat.st_mtime_ns, stat.st_size, sha256]
+
+
+def unchanged(path, recorded):
+  try:
+    stat = os.stat(path)
+  except OSError:
+    return recorded is None
+  if recorded is None:
+    return False
+  if [stat.st_mtime_ns, stat.st_size] == recorded[:2]:
+    return True
+  # The file was touched or rewritten, but its contents may be the same.
+  current = file_stat(path)
+  return current is not None and current[2] == recorded[2]
+
+
+def plan(jobs, build_cache=None, **kwargs):
+  # Returns an (input_file, output_file, reason) for every job, where
+  # reason says why it would be converted, or it's None if it's up to date.
+  results = []
+  for input_file, output_file in jobs:
+    reason = None
+    if build_cache is None:
+      reason = 'no build cache'
+    else:
+      entry, changed = build_cache.check(build_cache.key(input_file, **kwargs))
+      if entry is None:
+        reason = 'not cached'
+      elif changed:
+        reason = 'changed: {}'.format(', '.join(
+            os.path.relpath(path) for path in changed))
+    if reason is None and output_file and not os.path.exists(output_file):
+      reason = 'missing output'
+    results.append((input_file, output_file, reason))
+  return results
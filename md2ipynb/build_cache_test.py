@@ -0,0 +1,98 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import md2ipynb
+from . import build_cache
+from . import new_notebook
+
+
+def write(path, source, mtime):
+  with open(path, 'w') as f:
+    f.write(source)
+  os.utime(path, (mtime, mtime))
+
+
+class BuildCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.addCleanup(self.temp_dir.cleanup)
+    self.cache = build_cache.BuildCache(self.path('cache'))
+    self.page = self.path('page.md')
+    write(self.page, '# Page\n\n{% include "include.md" %}', 1)
+    write(self.path('include.md'), 'Included', 1)
+
+  def path(self, name):
+    return os.path.join(self.temp_dir.name, name)
+
+  def new_notebook(self, **kwargs):
+    kwargs.setdefault('include_dir', self.temp_dir.name)
+    with patch.object(md2ipynb.read, 'sections', wraps=md2ipynb.read.sections) as sections:
+      notebook = new_notebook(self.page, build_cache=self.cache, **kwargs)
+    return notebook, sections.call_count > 0
+
+  def test_cached(self):
+    notebook, converted = self.new_notebook()
+    self.assertTrue(converted)
+    cached_notebook, converted = self.new_notebook()
+    self.assertFalse(converted)
+    self.assertEqual(notebook, cached_notebook)
+
+  def test_options(self):
+    self.new_notebook()
+    _, converted = self.new_notebook(notebook_title='Title')
+    self.assertTrue(converted)
+    _, converted = self.new_notebook(variables={'x': '1'})
+    self.assertTrue(converted)
+    _, converted = self.new_notebook(variables={'x': '1'})
+    self.assertFalse(converted)
+
+  def test_changed_include(self):
+    self.new_notebook()
+
+    # Touching a file without changing its contents still uses the cache.
+    write(self.path('include.md'), 'Included', 2)
+    _, converted = self.new_notebook()
+    self.assertFalse(converted)
+
+    write(self.path('include.md'), 'Changed', 3)
+    notebook, converted = self.new_notebook()
+    self.assertTrue(converted)
+    self.assertEqual('# Page\n\nChanged', notebook.cells[0].source)
+
+  def test_plan(self):
+    jobs = [(self.page, self.path('page.ipynb'))]
+    kwargs = {'build_cache': self.cache, 'include_dir': self.temp_dir.name}
+    self.assertEqual(
+        [(self.page, self.path('page.ipynb'), 'not cached')],
+        build_cache.plan(jobs, **kwargs))
+
+    md2ipynb.batch.convert(self.page, self.path('page.ipynb'), **kwargs)
+    self.assertEqual(
+        [(self.page, self.path('page.ipynb'), None)],
+        build_cache.plan(jobs, **kwargs))
+
+    write(self.path('include.md'), 'Changed', 2)
+    expected = 'changed: {}'.format(os.path.relpath(self.path('include.md')))
+    self.assertEqual(
+        [(self.page, self.path('page.ipynb'), expected)],
+        build_cache.plan(jobs, **kwargs))
+
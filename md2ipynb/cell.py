@@ -0,0 +1,191 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+
+import nbformat
+from nbformat.v4.nbbase import random_cell_id
+
+# Metadata templates shared by all the cells that use them,
+# they must never be modified.
+NO_METADATA = {}
+FORM_VIEW_METADATA = {'cellView': 'form'}
+
+
+# Fields that code cells have, along with their defaults.
+CODE_CELL_DEFAULTS = {'execution_count': None, 'outputs': []}
+
+
+class Cell(object):
+  # A markdown or code cell as the steps generate it, much smaller and
+  # faster to create than an nbformat.NotebookNode. new_notebook() converts
+  # them with to_node(), and md2ipynb.serializer writes them directly.
+  #   metadata_id: the cell's initial metadata 'id', or None.
+  #   metadata_template: the rest of the initial metadata, shared across cells.
+  #
+  # Like a NotebookNode, it can be changed by custom steps, either as
+  # cell.source or as cell['source']. The metadata is only copied from
+  # the shared template the first time it's read, and any other field
+  # like 'outputs' is only stored once it's read or set.
+  __slots__ = ('cell_type', 'id', 'source', 'metadata_id', 'metadata_template',
+               '_metadata', '_fields')
+
+  def __init__(self, cell_type, source='', metadata_id=None,
+               metadata_template=NO_METADATA, id=None):
+    self.cell_type = cell_type
+    self.id = id or random_cell_id()
+    self.source = source
+    self.metadata_id = metadata_id
+    self.metadata_template = metadata_template
+    self._metadata = None
+    self._fields = None
+
+  @property
+  def metadata(self):
+    if self._metadata is None:
+      self._metadata = self._metadata_dict()
+    return self._metadata
+
+  @metadata.setter
+  def metadata(self, metadata):
+    self._metadata = metadata
+
+  def _metadata_dict(self):
+    # The metadata to write, without copying it into the cell.
+    if self._metadata is not None:
+      return self._metadata
+    metadata = dict(self.metadata_template)
+    if self.metadata_id is not None:
+      metadata['id'] = self.metadata_id
+    return metadata
+
+  def to_dict(self):
+    cell = {
+        'cell_type': self.cell_type,
+        'id': self.id,
+        'metadata': self._metadata_dict(),
+        'source': self.source,
+    }
+    if self.cell_type == 'code':
+      cell['execution_count'] = None
+      cell['outputs'] = []
+    if self._fields:
+      cell.update(self._fields)
+    return cell
+
+  def to_node(self):
+    return nbformat.from_dict(self.to_dict())
+
+  def __getitem__(self, key):
+    if key in ('cell_type', 'id', 'metadata', 'source'):
+      return getattr(self, key)
+    if self._fields is None or key not in self._fields:
+      if self.cell_type != 'code' or key not in CODE_CELL_DEFAULTS:
+        raise KeyError(key)
+      # Stored, so cell['outputs'].append(output) isn't lost.
+      self[key] = [] if key == 'outputs' else CODE_CELL_DEFAULTS[key]
+    return self._fields[key]
+
+  def __setitem__(self, key, value):
+    if key in ('cell_type', 'id', 'metadata', 'source'):
+      setattr(self, key, value)
+    else:
+      if self._fields is None:
+        self._fields = {}
+      self._fields[key] = value
+
+  def __getattr__(self, name):
+    # Only called for names that aren't slots, like cell.outputs.
+    if name.startswith('_'):
+      raise AttributeError(name)
+    try:
+      return self[name]
+    except KeyError:
+      raise AttributeError(name)
+
+  def get(self, key, default=None):
+    try:
+      return self[key]
+    except KeyError:
+      return default
+
+  def keys(self):
+    return self.to_dict().keys()
+
+  def __iter__(self):
+    return iter(self.to_dict())
+
+  def __eq__(self, other):
+    if isinstance(other, Cell):
+      other = other.to_dict()
+    return self.to_dict() == other
+
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = None
+
+  def __repr__(self):
+    return 'Cell({!r}, {!r}, {!r})'.format(
+        self.cell_type, self.source, self._metadata_dict())
+
+
+def markdown_cell(source, metadata_id=None, metadata_template=NO_METADATA):
+  return Cell('markdown', source, metadata_id, metadata_template)
+
+
+def code_cell(source, metadata_id=None, metadata_template=NO_METADATA):
+  return Cell('code', source, metadata_id, metadata_template)
+
+
+def with_stable_ids(cells):
+  # Gives each Cell an id derived from its type and metadata id instead
+  # of a random one, so converting the same page twice gives the same
+  # notebook. Repeated ids are numbered.
+  used_ids = set()
+  for cell in cells:
+    if isinstance(cell, Cell):
+      metadata_id = cell.metadata_id
+      if cell._metadata is not None:
+        metadata_id = cell._metadata.get('id')
+      key = '{}:{}'.format(cell.cell_type, metadata_id)
+      cell_id = hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]
+      i = 2
+      while cell_id in used_ids:
+        cell_id = '{}-{}'.format(cell_id.split('-')[0], i)
+        i += 1
+      cell.id = cell_id
+      used_ids.add(cell_id)
+    else:
+      used_ids.add(cell.get('id'))
+    yield cell
+
+
+def to_node(cell):
+  # Cells from custom steps may already be NotebookNodes.
+  if isinstance(cell, Cell):
+    return cell.to_node()
+  return cell
+
+
+def to_notebook_node(notebook):
+  # A notebook with only NotebookNode cells, like nbformat expects.
+  if not any(isinstance(cell, Cell) for cell in notebook.get('cells', [])):
+    return notebook
+  notebook = nbformat.NotebookNode(notebook)
+  notebook['cells'] = [to_node(cell) for cell in notebook['cells']]
+  return notebook
@@ -0,0 +1,116 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import pickle
+import unittest
+
+import nbformat
+
+from . import Cell
+from . import new_notebook
+from . import serializer
+from .cell import FORM_VIEW_METADATA
+from .cell import code_cell
+from .cell import markdown_cell
+from .cell import with_stable_ids
+
+
+def without_ids(notebook):
+  notebook = json.loads(serializer.dumps(notebook))
+  for cell in notebook['cells']:
+    del cell['id']
+  return notebook
+
+
+class CellTest(unittest.TestCase):
+  def test_markdown_cell(self):
+    cell = markdown_cell('# Title', 'title')
+    expected = nbformat.v4.new_markdown_cell(
+        '# Title', id=cell.id, metadata={'id': 'title'})
+    self.assertEqual(expected, cell.to_node())
+    self.assertIsInstance(cell.to_node(), nbformat.NotebookNode)
+    self.assertEqual(cell, expected)
+    self.assertEqual('# Title', cell['source'])
+    self.assertEqual({'id': 'title'}, cell.metadata)
+
+  def test_code_cell(self):
+    cell = code_cell('#@title Form', 'form', FORM_VIEW_METADATA)
+    expected = nbformat.v4.new_code_cell(
+        '#@title Form', id=cell.id,
+        metadata={'id': 'form', 'cellView': 'form'})
+    self.assertEqual(expected, cell.to_node())
+    self.assertEqual([], cell['outputs'])
+
+    # Metadata templates are shared, but never modified.
+    cell.metadata['cellView'] = 'code'
+    self.assertEqual({'id': 'form', 'cellView': 'code'}, cell['metadata'])
+    self.assertEqual({'cellView': 'form'}, FORM_VIEW_METADATA)
+    self.assertEqual({'cellView': 'form'},
+                     code_cell('', None, FORM_VIEW_METADATA).metadata)
+
+  def test_modify(self):
+    # Custom steps can change cells like NotebookNodes.
+    cell = code_cell('print(1)', 'code')
+    cell['source'] = 'print(2)'
+    cell['metadata']['tags'] = ['a']
+    cell['execution_count'] = 1
+    cell.outputs.append(nbformat.v4.new_output('stream', text='2\n'))
+    expected = nbformat.v4.new_code_cell(
+        'print(2)', id=cell.id, execution_count=1,
+        metadata={'id': 'code', 'tags': ['a']},
+        outputs=[nbformat.v4.new_output('stream', text='2\n')])
+    self.assertEqual(expected, cell.to_node())
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells = [cell]
+    self.assertEqual(
+        nbformat.writes(nbformat.v4.new_notebook(cells=[expected])),
+        serializer.dumps(notebook))
+
+    cell = markdown_cell('text')
+    self.assertIsNone(cell.get('outputs'))
+    with self.assertRaises(KeyError):
+      cell['outputs']
+    with self.assertRaises(AttributeError):
+      cell.outputs
+
+  def test_pickle(self):
+    cell = code_cell('print(1)', 'code')
+    self.assertEqual(cell, pickle.loads(pickle.dumps(cell)))
+
+  def test_new_notebook(self):
+    args = ('test/classes-code-block.md',)
+    kwargs = dict(docs_url='www.docs-url.com', github_ipynb_url='github.com/a/b')
+    notebook = new_notebook(*args, **kwargs)
+    self.assertTrue(all(isinstance(cell, nbformat.NotebookNode)
+                        for cell in notebook.cells))
+    compact = new_notebook(*args, compact_cells=True, **kwargs)
+    self.assertTrue(all(isinstance(cell, Cell) for cell in compact.cells))
+    self.assertEqual(without_ids(notebook), without_ids(compact))
+    self.assertTrue(serializer.Validator().validate(compact))
+
+  def test_with_stable_ids(self):
+    def cells():
+      return [markdown_cell('# Title', 'title'), code_cell('print(1)', 'code'),
+              code_cell('print(2)', 'code'), code_cell('print(3)', 'code')]
+    ids = [cell.id for cell in with_stable_ids(cells())]
+    self.assertEqual(ids, [cell.id for cell in with_stable_ids(cells())])
+    self.assertEqual(len(ids), len(set(ids)))
+    self.assertEqual([ids[1] + '-2', ids[1] + '-3'], ids[2:])
+    notebook = nbformat.v4.new_notebook()
+    notebook.cells = list(with_stable_ids(cells()))
+    self.assertTrue(serializer.Validator().validate(notebook))
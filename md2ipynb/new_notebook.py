@@ -35,34 +35,185 @@ def new_notebook(
     kernel='python3',
     steps=None,
     jinja_env=None,
+    github_cache=None,
+    bytecode_cache_dir=None,
+    fast_path=True,
+    build_cache=None,
+    profiler=None,
+    compact_cells=False,
+    spans=False,
 ):
+  # With `compact_cells`, the notebook's cells are md2ipynb.Cell objects
+  # instead of NotebookNodes, to be written with md2ipynb.serializer.
+  # With `spans`, the paragraphs are md2ipynb.Span views of the rendered
+  # text, which are only copied when a step needs them.
+  if not jinja_env:
+    jinja_env = md2ipynb.read.new_jinja_env(
+        include_dir,
+        github_cache=github_cache,
+        bytecode_cache_dir=bytecode_cache_dir,
+        fast_path=fast_path,
+    )
 
-  sections = md2ipynb.read.sections(input_file, variables, include_dir, jinja_env)
-  paragraphs = md2ipynb.apply(sections, [
+  # Custom steps can't be fingerprinted, so they're never cached.
+  if build_cache is not None and not steps and input_file != '-' and \
+      isinstance(input_file, str):
+    key = build_cache.key(
+        input_file,
+        jinja_env,
+        variables=variables,
+        imports=imports,
+        include_dir=include_dir,
+        notebook_title=notebook_title,
+        keep_classes=keep_classes,
+        filter_classes=filter_classes,
+        shell=shell,
+        docs_url=docs_url,
+        docs_logo_url=docs_logo_url,
+        github_ipynb_url=github_ipynb_url,
+        kernel=kernel,
+    )
+    entry = build_cache.get(key)
+    if entry is not None:
+      # Report the cached dependencies as if the notebook was converted.
+      for path in entry['files']:
+        md2ipynb.read.dependencies.add_file(path)
+      for url, branch in entry['urls'].items():
+        md2ipynb.read.dependencies.add_url(url, branch)
+      return nbformat.reads(entry['notebook'], as_version=4)
+
+    with md2ipynb.read.dependencies.record() as notebook_dependencies:
+      md2ipynb.read.dependencies.add_file(input_file)
+      notebook = new_notebook(
+          input_file,
+          variables=variables,
+          imports=imports,
+          include_dir=include_dir,
+          notebook_title=notebook_title,
+          keep_classes=keep_classes,
+          filter_classes=filter_classes,
+          shell=shell,
+          docs_url=docs_url,
+          docs_logo_url=docs_logo_url,
+          github_ipynb_url=github_ipynb_url,
+          kernel=kernel,
+          jinja_env=jinja_env,
+          profiler=profiler,
+          compact_cells=compact_cells,
+          spans=spans,
+      )
+    # The notebook is validated when it's written.
+    build_cache.put(key, notebook_dependencies, md2ipynb.serializer.dumps(
+        notebook, None, md2ipynb.serializer.Validator('never')))
+    return notebook
+
+  cells, metadata = notebook_parts(
+      input_file,
+      variables=variables,
+      imports=imports,
+      include_dir=include_dir,
+      notebook_title=notebook_title,
+      keep_classes=keep_classes,
+      filter_classes=filter_classes,
+      docs_url=docs_url,
+      docs_logo_url=docs_logo_url,
+      github_ipynb_url=github_ipynb_url,
+      kernel=kernel,
+      steps=steps,
+      jinja_env=jinja_env,
+      profiler=profiler,
+      spans=spans,
+  )
+  cells = list(cells)
+
+  # Create the notebook with all the cells.
+  if compact_cells:
+    return nbformat.NotebookNode(
+        nbformat=nbformat.v4.nbformat,
+        nbformat_minor=nbformat.v4.nbformat_minor,
+        metadata=nbformat.from_dict(metadata()),
+        cells=cells,
+    )
+  cells = [md2ipynb.cell.to_node(cell) for cell in cells]
+  return nbformat.v4.new_notebook(cells=cells, metadata=metadata())
+
+
+def stream_notebook(input_file, f, indent=1, validator=None, name=None, **kwargs):
+  # Writes the notebook JSON into `f` as the steps yield each cell, without
+  # creating the notebook, so only one cell is kept in memory at a time.
+  # Takes the same arguments as new_notebook().
+  kwargs.pop('compact_cells', None)
+  build_cache = kwargs.pop('build_cache', None)
+  if build_cache is not None:
+    # The build cache stores whole notebooks.
+    notebook = new_notebook(
+        input_file, build_cache=build_cache, compact_cells=True, **kwargs)
+    md2ipynb.serializer.dump(notebook, f, indent, validator, name)
+    return
+  cells, metadata = notebook_parts(input_file, **kwargs)
+  md2ipynb.serializer.dump_cells(cells, f, metadata, indent, validator, name)
+
+
+def notebook_parts(
+    input_file,
+    variables=None,
+    imports=None,
+    include_dir=None,
+    notebook_title=None,
+    keep_classes=None,
+    filter_classes=None,
+    shell=None,
+    docs_url=None,
+    docs_logo_url=None,
+    github_ipynb_url=None,
+    kernel='python3',
+    steps=None,
+    jinja_env=None,
+    github_cache=None,
+    bytecode_cache_dir=None,
+    fast_path=True,
+    profiler=None,
+    spans=False,
+):
+  # Returns a lazy iterator of the notebook's cells, and a function that
+  # returns the notebook's metadata once all the cells were consumed.
+  if not jinja_env:
+    jinja_env = md2ipynb.read.new_jinja_env(
+        include_dir,
+        github_cache=github_cache,
+        bytecode_cache_dir=bytecode_cache_dir,
+        fast_path=fast_path,
+    )
+
+  sections = md2ipynb.read.sections(
+      input_file, variables, include_dir, jinja_env, spans=spans)
+  if profiler:
+    sections = profiler.iterate('read.sections', sections)
+  pipeline = md2ipynb.Pipeline([
       (md2ipynb.steps.imports, imports, variables, include_dir, jinja_env),
       md2ipynb.steps.flatten,
       (md2ipynb.steps.filter_classes, keep_classes, filter_classes),
-  ])
-  paragraphs = md2ipynb.apply(paragraphs, steps)
-  cells = list(md2ipynb.apply(paragraphs, [
+  ]) + md2ipynb.Pipeline(steps) + md2ipynb.Pipeline([
       md2ipynb.steps.paragraphs_to_cells,
       (md2ipynb.steps.view_the_docs, docs_url, docs_logo_url),
       (md2ipynb.steps.open_in_colab, github_ipynb_url),
-  ]))
+  ])
 
-  for cell in cells:
-    if notebook_title:
-      break
-    first_line = cell.source.splitlines()[0]
-    if first_line.startswith('#'):
-      notebook_title = first_line.strip('# ')
+  # The title is the first header, unless there's a notebook_title.
+  titles = [notebook_title]
+  def cells():
+    for cell in md2ipynb.cell.with_stable_ids(pipeline.stream(sections, profiler)):
+      if not titles[0] and cell.source.startswith('#'):
+        titles[0] = cell.source.splitlines()[0].strip('# ')
+      yield cell
 
-  # Create the notebook with all the cells.
-  metadata = {
-    'colab': {"toc_visible": True},
-    'kernelspec': {'name': kernel, 'display_name': kernel},
-  }
-  if notebook_title:
-    metadata['colab']['name'] = notebook_title
+  def metadata():
+    metadata = {
+      'colab': {"toc_visible": True},
+      'kernelspec': {'name': kernel, 'display_name': kernel},
+    }
+    if titles[0]:
+      metadata['colab']['name'] = titles[0]
+    return metadata
 
-  return nbformat.v4.new_notebook(cells=cells, metadata=metadata)
+  return cells(), metadata
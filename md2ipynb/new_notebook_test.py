@@ -15,11 +15,18 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import io
 import json
 import nbformat
+import os
+import tempfile
+import tracemalloc
 import unittest
 
 from . import new_notebook
+from . import testing
+from . import stream_notebook
+from .new_notebook import notebook_parts
 
 source_file = 'test/hello.md'
 variables_file = 'test/hello-variables.json'
@@ -28,6 +35,14 @@ with open(variables_file) as f:
   variables = json.load(f)
 
 
+def setUpModule():
+  testing.no_github_retries.start()
+
+
+def tearDownModule():
+  testing.no_github_retries.stop()
+
+
 def md_cell(source, id=''):
   return nbformat.v4.new_markdown_cell(source, metadata={'id': id})
 
@@ -71,3 +86,45 @@ class NewNotebookTest(unittest.TestCase):
     actual = as_dict(new_notebook(source_file, variables))
     self.maxDiff = None
     self.assertEqual(expected, actual)
+
+  def test_stream_notebook(self):
+    kwargs = dict(docs_url='www.docs-url.com', keep_classes=['classA'])
+    expected = as_dict(new_notebook('test/classes-code-block.md', **kwargs))
+    f = io.StringIO()
+    stream_notebook('test/classes-code-block.md', f, **kwargs)
+    actual = json.loads(f.getvalue())
+    for notebook in [expected, actual]:
+      for cell in notebook['cells']:
+        del cell['id']
+    self.assertEqual(expected, actual)
+
+  def test_spans(self):
+    kwargs = dict(docs_url='www.docs-url.com', keep_classes=['classA'])
+    expected = new_notebook('test/classes-code-block.md', **kwargs)
+    actual = new_notebook('test/classes-code-block.md', spans=True, **kwargs)
+    self.assertEqual(
+        [cell.source for cell in expected.cells],
+        [cell.source for cell in actual.cells])
+
+  def test_spans_memory(self):
+    # A large code block is only copied once into its cell with spans.
+    code = '\n'.join('x_{} = {}'.format(i, i) for i in range(50000))
+    with tempfile.TemporaryDirectory() as tmp:
+      input_file = os.path.join(tmp, 'large.md')
+      with open(input_file, 'w') as f:
+        f.write('# Title\n\n```py\n{}\n```\n'.format(code))
+
+      def peak_memory(spans):
+        tracemalloc.start()
+        try:
+          cells, _ = notebook_parts(input_file, spans=spans)
+          sources = [cell.source for cell in cells]
+          return tracemalloc.get_traced_memory()[1], sources
+        finally:
+          tracemalloc.stop()
+
+      peak, expected = peak_memory(spans=False)
+      spans_peak, actual = peak_memory(spans=True)
+    self.assertEqual(expected, actual)
+    self.assertEqual(code, actual[1])
+    self.assertLess(spans_peak, peak * 0.75)
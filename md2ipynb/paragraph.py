@@ -0,0 +1,244 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from .util import attributes_re
+from .util import parse_attributes
+
+
+class Paragraph(str):
+  # A paragraph's text, along with what the steps need to know about it:
+  #   kind: 'header', 'code' for a ``` code block, or 'text'.
+  #   attributes: the parsed {: #id .class key='value'} attributes, or None.
+  #   lang: the language of a ``` code block, '' if it has none,
+  #     or None if the paragraph doesn't start with ```.
+  #   line_count: the number of '\n' separated lines.
+  #
+  # It's still a str, so steps can use it as one, but str methods
+  # return a plain str. CPython doesn't support non-empty __slots__
+  # on str subclasses, and a __dict__ would make every paragraph larger
+  # than its text, so the kind is stored as the paragraph's class instead.
+  # Paragraph(text) finds out the kind from the text, while the tokenizer
+  # creates paragraphs with the class for the kind it already matched,
+  # which are created by str.__new__() without going through Python code.
+  __slots__ = ()
+
+  def __new__(cls, text=''):
+    if cls is Paragraph:
+      cls = PARAGRAPH_TYPES[paragraph_kind(text)]
+    return str.__new__(cls, text)
+
+  @property
+  def attributes(self):
+    return parse_attributes(self) if '{:' in self else None
+
+  @property
+  def lang(self):
+    if not self.startswith('```'):
+      return None
+    return first_and_last_lines(self)[0].lstrip('`').strip()
+
+  @property
+  def line_count(self):
+    return self.count('\n') + 1 if self else 0
+
+  # These are the same for a Span, which is only copied when needed.
+  @property
+  def text(self):
+    return self
+
+  @property
+  def first_line(self):
+    return first_and_last_lines(self)[0]
+
+  @property
+  def code(self):
+    # The lines between the ``` lines of a code block.
+    return '\n'.join(self.splitlines()[1:-1])
+
+  def without_attributes(self):
+    return Paragraph(attributes_re.sub('', self).strip('\n'))
+
+
+class HeaderParagraph(Paragraph):
+  __slots__ = ()
+  __new__ = str.__new__
+  kind = 'header'
+  lang = None
+
+
+class CodeParagraph(Paragraph):
+  __slots__ = ()
+  __new__ = str.__new__
+  kind = 'code'
+
+
+class TextParagraph(Paragraph):
+  __slots__ = ()
+  __new__ = str.__new__
+  kind = 'text'
+
+
+PARAGRAPH_TYPES = {
+    'header': HeaderParagraph,
+    'code': CodeParagraph,
+    'text': TextParagraph,
+}
+
+
+def paragraph_kind(text):
+  if text.startswith('#'):
+    return 'header'
+  if text.startswith('```') and first_and_last_lines(text)[1].startswith('```'):
+    return 'code'
+  return 'text'
+
+
+class Span(object):
+  # A paragraph as a view of buffer[start:end], where the buffer has
+  # '\n' separated lines. The text is only copied when a step needs it,
+  # with str(span) or span.text, so a large code block can go from the
+  # rendered buffer into its cell with a single copy.
+  # It has the same kind, attributes, lang and line_count as a Paragraph,
+  # and any other str method is called on a copy of the text, so steps
+  # can still use it like a str.
+  __slots__ = ('buffer', 'start', 'end', 'kind')
+
+  def __init__(self, buffer, start=0, end=None, kind=None):
+    self.buffer = buffer
+    self.start = start
+    self.end = len(buffer) if end is None else end
+    self.kind = kind or span_kind(buffer, start, self.end)
+
+  @property
+  def text(self):
+    return self.buffer[self.start:self.end]
+
+  @property
+  def attributes(self):
+    if '{:' not in self:
+      return None
+    return parse_attributes(self.buffer, self.start, self.end)
+
+  @property
+  def lang(self):
+    if not self.startswith('```'):
+      return None
+    return self.first_line.lstrip('`').strip()
+
+  @property
+  def line_count(self):
+    return self.buffer.count('\n', self.start, self.end) + 1 if self else 0
+
+  @property
+  def first_line(self):
+    end = self.buffer.find('\n', self.start, self.end)
+    return self.buffer[self.start:self.end if end < 0 else end]
+
+  @property
+  def code(self):
+    # Sliced out of the buffer, without splitting the lines.
+    # A '\n' at the end doesn't start another line, like in splitlines().
+    first_end = self.buffer.find('\n', self.start, self.end)
+    last_start = self.buffer.rfind('\n', self.start, self.end - 1)
+    if first_end < 0 or last_start <= first_end:
+      return ''
+    return self.buffer[first_end + 1:last_start]
+
+  def without_attributes(self):
+    # Attributes at the start or the end are left out of the span, the
+    # text is only copied if there are any others in between.
+    buffer, start, end = self.buffer, self.start, self.end
+    matches = list(attributes_re.finditer(buffer, start, end))
+    while matches and matches[0].start() == start:
+      start = matches.pop(0).end()
+    while matches and matches[-1].end() == end:
+      end = matches.pop().start()
+    if matches:
+      return Paragraph(attributes_re.sub('', self.text).strip('\n'))
+    while start < end and buffer[start] == '\n':
+      start += 1
+    while end > start and buffer[end - 1] == '\n':
+      end -= 1
+    return Span(buffer, start, end)
+
+  def startswith(self, prefix):
+    return self.buffer.startswith(prefix, self.start, self.end)
+
+  def endswith(self, suffix):
+    return self.buffer.endswith(suffix, self.start, self.end)
+
+  def __contains__(self, text):
+    return self.buffer.find(text, self.start, self.end) >= 0
+
+  def __len__(self):
+    return self.end - self.start
+
+  def __str__(self):
+    return self.text
+
+  def __add__(self, other):
+    return self.text + str(other)
+
+  def __radd__(self, other):
+    return str(other) + self.text
+
+  def __eq__(self, other):
+    if isinstance(other, Span):
+      other = other.text
+    return self.text == other
+
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = None
+
+  def __getattr__(self, name):
+    if name.startswith('_'):
+      raise AttributeError(name)
+    return getattr(self.text, name)
+
+  def __repr__(self):
+    return 'Span({}, {}, {!r})'.format(self.start, self.end, self.text)
+
+
+def span_kind(buffer, start, end):
+  # Same as paragraph_kind(buffer[start:end]), without copying it.
+  if buffer.startswith('#', start, end):
+    return 'header'
+  last_start = max(buffer.rfind('\n', start, end - 1) + 1, start)
+  if buffer.startswith('```', start, end) and buffer.startswith('```', last_start, end):
+    return 'code'
+  return 'text'
+
+
+def as_paragraph(text):
+  # Steps also accept plain strings from custom steps.
+  if isinstance(text, (Paragraph, Span)):
+    return text
+  return Paragraph(str(text))
+
+
+def first_and_last_lines(text):
+  # Same as text.splitlines()[0] and text.splitlines()[-1],
+  # without splitting all the lines.
+  if not text:
+    return '', ''
+  first_line = text[:text.find('\n')] if '\n' in text else text
+  first_line = first_line.splitlines()[0] if first_line else ''
+  last_line = text[text.rfind('\n', 0, len(text) - 1) + 1:]
+  last_line = last_line.splitlines()[-1]
+  return first_line, last_line
@@ -0,0 +1,129 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import pickle
+import random
+import unittest
+
+from . import Paragraph
+from . import Span
+from . import read
+from .paragraph import CodeParagraph
+from .paragraph import HeaderParagraph
+from .paragraph import TextParagraph
+
+
+class ParagraphTest(unittest.TestCase):
+  def test_header(self):
+    paragraph = Paragraph('## Header {: #id}')
+    self.assertEqual('header', paragraph.kind)
+    self.assertEqual({'id': 'id'}, paragraph.attributes)
+    self.assertIsNone(paragraph.lang)
+    self.assertEqual(1, paragraph.line_count)
+
+  def test_code(self):
+    paragraph = Paragraph('```py \nprint(1)\n```')
+    self.assertEqual('code', paragraph.kind)
+    self.assertIsNone(paragraph.attributes)
+    self.assertEqual('py', paragraph.lang)
+    self.assertEqual(3, paragraph.line_count)
+
+  def test_text(self):
+    paragraph = Paragraph('Some text\n{: .class}')
+    self.assertEqual('text', paragraph.kind)
+    self.assertEqual({'class': ['class']}, paragraph.attributes)
+    self.assertIsNone(paragraph.lang)
+    self.assertEqual(2, paragraph.line_count)
+    self.assertEqual('text', Paragraph('```\nunterminated').kind)
+    self.assertEqual(0, Paragraph('').line_count)
+
+  def test_str(self):
+    paragraph = Paragraph('Hello world')
+    self.assertEqual('Hello world', paragraph)
+    self.assertEqual('Hi world', paragraph.replace('Hello', 'Hi'))
+    self.assertIs(str, type(paragraph.replace('Hello', 'Hi')))
+    self.assertEqual(paragraph, pickle.loads(pickle.dumps(paragraph)))
+    self.assertEqual('text', pickle.loads(pickle.dumps(paragraph)).kind)
+
+  def test_read_paragraphs(self):
+    paragraphs = list(read.paragraphs(['# Title', '', '```sh', 'ls', '```', '', 'text']))
+    self.assertEqual(
+        [HeaderParagraph, CodeParagraph, TextParagraph],
+        [type(p) for p in paragraphs])
+    self.assertEqual(['header', 'code', 'text'], [p.kind for p in paragraphs])
+    self.assertTrue(all(isinstance(p, Paragraph) for p in paragraphs))
+
+  def test_kind_types(self):
+    self.assertIs(HeaderParagraph, type(Paragraph('# Title')))
+    self.assertIs(CodeParagraph, type(Paragraph('```\ncode\n```')))
+    self.assertIs(TextParagraph, type(Paragraph('```\nunterminated')))
+    # The kind isn't found out again from the text when it's given.
+    self.assertEqual('text', TextParagraph('# Not a header').kind)
+    self.assertIs(HeaderParagraph, type(pickle.loads(pickle.dumps(Paragraph('# Title')))))
+
+
+class SpanTest(unittest.TestCase):
+  def test_span(self):
+    buffer = 'text\n```py {: .class}\nprint(1)\n```\nmore'
+    span = Span(buffer, 5, 34)
+    self.assertEqual('```py {: .class}\nprint(1)\n```', span.text)
+    self.assertEqual(span.text, str(span))
+    self.assertEqual(29, len(span))
+    self.assertEqual('code', span.kind)
+    self.assertEqual({'class': ['class']}, span.attributes)
+    self.assertEqual('py {: .class}', span.lang)
+    self.assertEqual(3, span.line_count)
+    self.assertEqual('```py {: .class}', span.first_line)
+    self.assertEqual('print(1)', span.code)
+    self.assertTrue(span.startswith('```'))
+    self.assertTrue(span.endswith('```'))
+    self.assertFalse(span.startswith('text'))
+    self.assertIn('print', span)
+    self.assertNotIn('more', span)
+    self.assertEqual(Paragraph(span.text), span)
+    self.assertEqual(span, Span(span.text))
+    self.assertEqual(['```py {: .class}', 'print(1)', '```'], span.splitlines())
+    self.assertEqual(span.text + '!', span + '!')
+    self.assertEqual('!' + span.text, '!' + span)
+
+  def test_same_as_paragraph(self):
+    pieces = ['text', '# h', '```', '```py', '```sh', 'ls', '{: .a}', 'x {: #i}',
+              '', '{: .language-py}', '```{: .b}', 'code']
+    rng = random.Random(0)
+    for _ in range(2000):
+      text = '\n'.join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+      paragraph = Paragraph(text)
+      span = Span('before\n' + text + '\nafter', 7, 7 + len(text))
+      for name in ['kind', 'attributes', 'lang', 'line_count', 'first_line', 'code']:
+        self.assertEqual(getattr(paragraph, name), getattr(span, name), (name, text))
+      expected = paragraph.without_attributes()
+      actual = span.without_attributes()
+      self.assertEqual(expected, actual, text)
+      self.assertEqual(expected.kind, actual.kind, text)
+
+  def test_without_attributes(self):
+    # Attributes around the text are left out of the span.
+    buffer = '{: .a}\n```\ncode\n```\n{: .b}'
+    span = Span(buffer).without_attributes()
+    self.assertIsInstance(span, Span)
+    self.assertIs(buffer, span.buffer)
+    self.assertEqual('code', span.kind)
+    self.assertEqual('```\ncode\n```', span)
+    # Attributes in between need a copy of the text.
+    paragraph = Span('a {: .a} b').without_attributes()
+    self.assertIsInstance(paragraph, Paragraph)
+    self.assertEqual('a b', paragraph)
@@ -0,0 +1,91 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from .profiler import step_name
+
+
+class Pipeline(object):
+  # An immutable sequence of steps, built once and applied to any number
+  # of inputs. Each step is a generator function, or a tuple of
+  # (function, *args) to pass additional arguments.
+  #
+  # stream() returns a lazy iterator, nothing runs until it's consumed.
+  # run() consumes it and returns a list.
+  def __init__(self, steps=None):
+    if isinstance(steps, Pipeline):
+      self._steps = steps.steps
+    else:
+      self._steps = tuple(normalize_step(step) for step in steps or [])
+
+  @property
+  def steps(self):
+    # A tuple of (function, args) pairs.
+    return self._steps
+
+  def then(self, *steps):
+    # Returns a new pipeline with the steps added at the end.
+    return self + Pipeline(steps)
+
+  def __add__(self, other):
+    if not isinstance(other, Pipeline):
+      return NotImplemented
+    pipeline = Pipeline()
+    pipeline._steps = self._steps + other._steps
+    return pipeline
+
+  def stream(self, inputs, profiler=None):
+    if profiler:
+      return self._stream_profiled(inputs, profiler)
+    for fn, args in self._steps:
+      inputs = fn(inputs, *args)
+    return iter(inputs)
+
+  def run(self, inputs, profiler=None):
+    if profiler:
+      with profiler.profile():
+        return list(self._compose_profiled(inputs, profiler))
+    return list(self.stream(inputs))
+
+  def _stream_profiled(self, inputs, profiler):
+    with profiler.profile():
+      for item in self._compose_profiled(inputs, profiler):
+        yield item
+
+  def _compose_profiled(self, inputs, profiler):
+    for fn, args in self._steps:
+      inputs = profiler.step(step_name(fn), fn, inputs, *args)
+    return inputs
+
+  def __len__(self):
+    return len(self._steps)
+
+  def __repr__(self):
+    return 'Pipeline([{}])'.format(', '.join(
+        step_name(fn) if not args else '({}, {})'.format(
+            step_name(fn), ', '.join(repr(arg) for arg in args))
+        for fn, args in self._steps))
+
+
+def normalize_step(step):
+  if isinstance(step, (tuple, list)):
+    fn, *args = step
+  else:
+    fn, args = step, []
+  if not callable(fn):
+    raise TypeError('pipeline steps must be callable or a tuple of '
+                    '(callable, *args), got: {!r}'.format(step))
+  return fn, tuple(args)
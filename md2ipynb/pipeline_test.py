@@ -0,0 +1,72 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import unittest
+
+from . import Pipeline
+
+
+def lowercase(lines):
+  for line in lines:
+    yield line.lower()
+
+
+def remove(lines, text='Hello'):
+  for line in lines:
+    yield line.replace(text, '*')
+
+
+class PipelineTest(unittest.TestCase):
+  def test_empty(self):
+    self.assertEqual(['a', 'b'], Pipeline().run(['a', 'b']))
+
+  def test_run(self):
+    pipeline = Pipeline([lowercase, (remove, 'hello')])
+    self.assertEqual(['* world', 'say *'], pipeline.run(['Hello World', 'Say hello']))
+
+  def test_reuse(self):
+    steps = [lowercase, (remove, 'hello')]
+    pipeline = Pipeline(steps)
+    self.assertEqual(['* a'], pipeline.run(['Hello a']))
+    self.assertEqual(['* b'], pipeline.run(['Hello b']))
+    self.assertEqual(2, len(steps))
+
+  def test_stream(self):
+    consumed = []
+    def inputs():
+      for line in ['A', 'B', 'C']:
+        consumed.append(line)
+        yield line
+
+    outputs = Pipeline([lowercase]).stream(inputs())
+    self.assertEqual([], consumed)
+    self.assertEqual('a', next(outputs))
+    self.assertEqual(['A'], consumed)
+    self.assertEqual(['b', 'c'], list(outputs))
+
+  def test_then(self):
+    pipeline = Pipeline([lowercase])
+    extended = pipeline.then((remove, 'a'))
+    self.assertEqual(1, len(pipeline))
+    self.assertEqual(['b*'], extended.run(['BA']))
+    self.assertEqual(['b*'], (pipeline + Pipeline([(remove, 'a')])).run(['BA']))
+    self.assertEqual(extended.steps, Pipeline(extended).steps)
+
+  def test_invalid_step(self):
+    with self.assertRaises(TypeError):
+      Pipeline(['not a function'])
+
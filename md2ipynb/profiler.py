@@ -0,0 +1,156 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import cProfile
+import collections
+import contextlib
+import sys
+import time
+
+
+class StepStats(object):
+  # Times are exclusive to the step: the time spent producing its inputs
+  # is attributed to the step or reader that produced them.
+  def __init__(self, name, inputs, outputs):
+    self.name = name
+    self._inputs = inputs
+    self._outputs = outputs
+
+  @property
+  def wall_time(self):
+    return self._outputs.wall_time - (self._inputs.wall_time if self._inputs else 0)
+
+  @property
+  def cpu_time(self):
+    return self._outputs.cpu_time - (self._inputs.cpu_time if self._inputs else 0)
+
+  @property
+  def items_in(self):
+    return self._inputs.count if self._inputs else None
+
+  @property
+  def items_out(self):
+    return self._outputs.count
+
+  def __repr__(self):
+    return 'StepStats({!r}, wall_time={:.6f}, cpu_time={:.6f}, items_in={}, items_out={})'.format(
+        self.name, self.wall_time, self.cpu_time, self.items_in, self.items_out)
+
+
+class TimedIterator(object):
+  # Counts the items of an iterator and the total time spent getting them.
+  def __init__(self, iterable):
+    self.iterator = iter(iterable)
+    self.count = 0
+    self.wall_time = 0.0
+    self.cpu_time = 0.0
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+      item = next(self.iterator)
+    finally:
+      self.wall_time += time.perf_counter() - wall_start
+      self.cpu_time += time.process_time() - cpu_start
+    self.count += 1
+    return item
+
+
+class Profiler(object):
+  # Collects the time and item counts of every step run through apply().
+  # `callback(step_stats)` is called for each step once apply() finishes.
+  # With `cprofile=True`, apply() also runs under cProfile, see dump_stats().
+  def __init__(self, callback=None, cprofile=False):
+    self.callback = callback
+    self.steps = []
+    self.cprofile = cProfile.Profile() if cprofile else None
+    self._reported = 0
+    self._depth = 0
+
+  def iterate(self, name, iterable):
+    # Profiles reading an iterable, like the sections of a file.
+    outputs = TimedIterator(iterable)
+    self.steps.append(StepStats(name, None, outputs))
+    return outputs
+
+  def step(self, name, fn, inputs, *args):
+    # Calls a step with profiled inputs and returns its profiled outputs.
+    # A step can consume its inputs when called, so the call is timed too.
+    if not isinstance(inputs, TimedIterator):
+      inputs = TimedIterator(inputs)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    outputs = TimedIterator(fn(inputs, *args))
+    outputs.wall_time += time.perf_counter() - wall_start
+    outputs.cpu_time += time.process_time() - cpu_start
+    self.steps.append(StepStats(name, inputs, outputs))
+    return outputs
+
+  @contextlib.contextmanager
+  def profile(self):
+    # Used by apply(), reports the new steps to the callback when done.
+    self._depth += 1
+    if self.cprofile and self._depth == 1:
+      self.cprofile.enable()
+    try:
+      yield self
+    finally:
+      self._depth -= 1
+      if self.cprofile and self._depth == 0:
+        self.cprofile.disable()
+    if self.callback:
+      for stats in self.steps[self._reported:]:
+        self.callback(stats)
+    self._reported = len(self.steps)
+
+  def summary(self):
+    # Returns the total stats of each step name in the order they ran,
+    # as a list of (name, wall_time, cpu_time, items_in, items_out).
+    totals = collections.OrderedDict()
+    for stats in self.steps:
+      if stats.name not in totals:
+        totals[stats.name] = [0.0, 0.0, None, 0]
+      total = totals[stats.name]
+      total[0] += stats.wall_time
+      total[1] += stats.cpu_time
+      if stats.items_in is not None:
+        total[2] = (total[2] or 0) + stats.items_in
+      total[3] += stats.items_out
+    return [(name,) + tuple(total) for name, total in totals.items()]
+
+  def print_stats(self, f=None):
+    f = f or sys.stderr
+    print('{:<24} {:>10} {:>10} {:>10} {:>10}'.format(
+        'step', 'wall (s)', 'cpu (s)', 'items in', 'items out'), file=f)
+    for name, wall_time, cpu_time, items_in, items_out in self.summary():
+      print('{:<24} {:>10.4f} {:>10.4f} {:>10} {:>10}'.format(
+          name, wall_time, cpu_time,
+          '-' if items_in is None else items_in, items_out), file=f)
+
+  def dump_stats(self, path):
+    # Writes the cProfile stats to a file, to be loaded with pstats.
+    if not self.cprofile:
+      raise ValueError('cProfile is not enabled, use Profiler(cprofile=True)')
+    self.cprofile.dump_stats(path)
+
+
+def step_name(fn):
+  return getattr(fn, '__name__', None) or repr(fn)
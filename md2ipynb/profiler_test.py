@@ -0,0 +1,85 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import io
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from . import Profiler
+from . import apply
+from . import new_notebook
+
+
+def slow(items, seconds):
+  for item in items:
+    time.sleep(seconds)
+    yield item
+
+
+def duplicate(items):
+  for item in items:
+    yield item
+    yield item
+
+
+class ProfilerTest(unittest.TestCase):
+  def test_exclusive_times(self):
+    profiler = Profiler()
+    inputs = profiler.iterate('inputs', slow(range(3), 0.02))
+    actual = apply(inputs, [duplicate, (slow, 0.01)], profiler)
+    self.assertEqual([0, 0, 1, 1, 2, 2], actual)
+
+    names = [stats.name for stats in profiler.steps]
+    self.assertEqual(['inputs', 'duplicate', 'slow'], names)
+    inputs_stats, duplicate_stats, slow_stats = profiler.steps
+    self.assertEqual((None, 3), (inputs_stats.items_in, inputs_stats.items_out))
+    self.assertEqual((3, 6), (duplicate_stats.items_in, duplicate_stats.items_out))
+    self.assertEqual((6, 6), (slow_stats.items_in, slow_stats.items_out))
+    self.assertGreaterEqual(inputs_stats.wall_time, 0.06)
+    self.assertLess(duplicate_stats.wall_time, 0.02)
+    self.assertGreaterEqual(slow_stats.wall_time, 0.06)
+    self.assertLess(slow_stats.wall_time, 0.1)
+
+  def test_callback(self):
+    reported = []
+    profiler = Profiler(callback=reported.append)
+    apply(['a'], [duplicate], profiler)
+    apply(['b'], [duplicate, duplicate], profiler)
+    self.assertEqual(['duplicate'] * 3, [stats.name for stats in reported])
+    self.assertEqual([2, 2, 4], [stats.items_out for stats in reported])
+
+  def test_new_notebook(self):
+    profiler = Profiler(cprofile=True)
+    new_notebook('test/paragraphs.md', steps=[duplicate], profiler=profiler)
+    names = [name for name, *_ in profiler.summary()]
+    expected = [
+        'read.sections', 'imports', 'flatten', 'filter_classes', 'duplicate',
+        'paragraphs_to_cells', 'view_the_docs', 'open_in_colab',
+    ]
+    self.assertEqual(expected, names)
+
+    f = io.StringIO()
+    profiler.print_stats(f)
+    self.assertEqual(len(expected) + 1, len(f.getvalue().splitlines()))
+    with tempfile.TemporaryDirectory() as temp_dir:
+      path = os.path.join(temp_dir, 'profile.pstats')
+      profiler.dump_stats(path)
+      self.assertTrue(pstats.Stats(path).total_calls > 0)
+
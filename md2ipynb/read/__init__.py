@@ -15,8 +15,13 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from .dependencies import Dependencies
+from .http_session import FetchError
+from .github_cache import GithubCache
 from .github_sample import GithubSampleExt
 from .markdown_loader import MarkdownLoader
+from .markdown_loader import SourceCache
+from .jinja_env import new_jinja_env
 
 from .lines import lines
 from .paragraphs import paragraphs
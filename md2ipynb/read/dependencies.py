@@ -0,0 +1,93 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import contextlib
+import os
+import threading
+
+_local = threading.local()
+
+
+class Dependencies(object):
+  def __init__(self):
+    self.files = set()
+    self.urls = {}
+
+  def update(self, other):
+    self.files.update(other.files)
+    self.urls.update(other.urls)
+
+
+@contextlib.contextmanager
+def record():
+  # Records every file and github URL read in this thread while inside
+  # the context. Nested recorders also get the dependencies of the inner ones.
+  dependencies = Dependencies()
+  stack = _stack()
+  stack.append(dependencies)
+  try:
+    yield dependencies
+  finally:
+    stack.remove(dependencies)
+
+
+def add_file(path):
+  stack = _stack()
+  if stack:
+    path = os.path.abspath(path)
+    for dependencies in stack:
+      dependencies.files.add(path)
+
+
+def add_url(url, branch):
+  for dependencies in _stack():
+    dependencies.urls[url] = branch
+
+
+def _stack():
+  try:
+    return _local.stack
+  except AttributeError:
+    _local.stack = []
+    return _local.stack
+
+
+def depfile(target, dependencies, urls=False):
+  # A Make rule with the local files `target` depends on, which Ninja also
+  # understands. Remote URLs can't be prerequisites, but they can be
+  # listed as comments, which Make ignores and Ninja doesn't support.
+  files = sorted(relpath(path) for path in dependencies.files
+                 if os.path.isfile(path))
+  rule = '{}:'.format(depfile_escape(target))
+  if files:
+    rule += ' ' + ' \\\n  '.join(depfile_escape(path) for path in files)
+  lines = [rule]
+  if urls:
+    lines.extend('# {}'.format(url) for url in sorted(dependencies.urls))
+  return '\n'.join(lines) + '\n'
+
+
+def depfile_escape(path):
+  return path.replace('$', '$$').replace('#', '\\#').replace(' ', '\\ ')
+
+
+def relpath(path):
+  # Files under the current directory are relative, like Make expects.
+  relative_path = os.path.relpath(path)
+  if relative_path.startswith(os.pardir):
+    return path
+  return relative_path
@@ -0,0 +1,89 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+import tempfile
+import unittest
+
+from . import dependencies
+from . import lines
+from . import new_jinja_env
+from .github_sample import github_file_cache
+
+
+class DependenciesTest(unittest.TestCase):
+  def test_record_includes(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      page = os.path.join(temp_dir, 'page.md')
+      include = os.path.join(temp_dir, 'include.md')
+      with open(page, 'w') as f:
+        f.write('# Page\n\n{% include "include.md" %}')
+      with open(include, 'w') as f:
+        f.write('Included')
+      env = new_jinja_env(temp_dir)
+
+      # The second time the include comes from Jinja's template cache.
+      for _ in range(2):
+        with dependencies.record() as page_dependencies:
+          self.assertEqual(['# Page', '', 'Included'], list(lines(page, jinja_env=env)))
+        self.assertEqual({page, include}, page_dependencies.files)
+        self.assertEqual({}, page_dependencies.urls)
+
+  def test_record_github_samples(self):
+    url = 'https://raw.githubusercontent.com/owner/repo/main/sample.py'
+    source = '{% github_sample /owner/repo/blob/main/sample.py tag:x %}'
+    github_file_cache[url] = '# [START x]\nprint(1)\n# [END x]'
+    try:
+      with dependencies.record() as outer:
+        with dependencies.record() as inner:
+          self.assertEqual(['print(1)'], list(lines([source])))
+    finally:
+      del github_file_cache[url]
+    self.assertEqual({url: 'main'}, inner.urls)
+    self.assertEqual({url: 'main'}, outer.urls)
+
+  def test_not_recording(self):
+    dependencies.add_file('test/hello.md')
+    with dependencies.record() as page_dependencies:
+      pass
+    self.assertEqual(set(), page_dependencies.files)
+
+
+class DepfileTest(unittest.TestCase):
+  def setUp(self):
+    self.dependencies = dependencies.Dependencies()
+    self.dependencies.files.update([
+        os.path.abspath('test/title.md'),
+        os.path.abspath('test/hello.md'),
+        os.path.abspath('test/missing.md'),
+    ])
+    self.dependencies.urls['https://example.com/sample.py'] = 'main'
+
+  def test_depfile(self):
+    expected = 'out.ipynb: test/hello.md \\\n  test/title.md\n'
+    self.assertEqual(expected, dependencies.depfile('out.ipynb', self.dependencies))
+
+  def test_depfile_escape(self):
+    actual = dependencies.depfile('my $notebook#1.ipynb', dependencies.Dependencies())
+    self.assertEqual('my\\ $$notebook\\#1.ipynb:\n', actual)
+
+  def test_depfile_urls(self):
+    expected = ('out.ipynb: test/hello.md \\\n  test/title.md\n'
+                '# https://example.com/sample.py\n')
+    actual = dependencies.depfile('out.ipynb', self.dependencies, urls=True)
+    self.assertEqual(expected, actual)
+
@@ -0,0 +1,178 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from . import http_session
+from .. import util
+
+
+class GithubCache(object):
+  # On-disk cache of downloaded files, shared across processes.
+  # File contents are stored by their SHA-256 hash in `objects/`,
+  # and each URL has an entry in `urls/` pointing to its contents
+  # along with the ETag to revalidate it.
+  #
+  # Entries checked less than `ttl` seconds ago are used as they are,
+  # older entries are revalidated with a conditional request.
+  def __init__(self, directory, ttl=0):
+    self.directory = directory
+    self.ttl = ttl
+
+  def get(self, url, params=None, get=None):
+    get = get or http_session.get
+    entry = self.entry(url)
+    if entry and time.time() - entry['checked'] < self.ttl:
+      contents = self.read_object(entry['sha256'])
+      if contents is not None:
+        return contents
+
+    headers = {}
+    if entry and entry.get('etag') and self.has_object(entry['sha256']):
+      headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified') and self.has_object(entry['sha256']):
+      headers['If-Modified-Since'] = entry['last_modified']
+
+    req = get(url, params=params, headers=headers)
+    if req.status_code == requests.codes.not_modified:
+      entry['checked'] = time.time()
+      self.write_entry(url, entry)
+      return self.read_object(entry['sha256'])
+
+    contents = req.text
+    now = time.time()
+    self.write_entry(url, {
+        'url': url,
+        'etag': req.headers.get('ETag'),
+        'last_modified': req.headers.get('Last-Modified'),
+        'sha256': self.write_object(contents),
+        'fetched': now,
+        'checked': now,
+    })
+    return contents
+
+  def entries(self):
+    urls_dir = os.path.join(self.directory, 'urls')
+    if not os.path.isdir(urls_dir):
+      return
+    for name in sorted(os.listdir(urls_dir)):
+      entry = _read_json(os.path.join(urls_dir, name))
+      if entry:
+        yield entry
+
+  def entry(self, url):
+    return _read_json(self._entry_path(url))
+
+  def write_entry(self, url, entry):
+    util.write_atomic(self._entry_path(url), json.dumps(entry, sort_keys=True))
+
+  def has_object(self, sha256):
+    return os.path.exists(self._object_path(sha256))
+
+  def read_object(self, sha256):
+    try:
+      with open(self._object_path(sha256), encoding='utf-8') as f:
+        return f.read()
+    except IOError:
+      return None
+
+  def write_object(self, contents):
+    sha256 = hashlib.sha256(contents.encode('utf-8')).hexdigest()
+    if not self.has_object(sha256):
+      util.write_atomic(self._object_path(sha256), contents)
+    return sha256
+
+  def prune(self, max_age=None):
+    # Removes URL entries not checked in the last `max_age` seconds,
+    # or all of them if `max_age` is None, as well as any contents
+    # no longer referenced by a URL entry.
+    # Returns the number of URL entries and objects removed.
+    removed_entries = 0
+    referenced = set()
+    now = time.time()
+    for entry in list(self.entries()):
+      if max_age is None or now - entry['checked'] > max_age:
+        os.remove(self._entry_path(entry['url']))
+        removed_entries += 1
+      else:
+        referenced.add(entry['sha256'])
+
+    removed_objects = 0
+    objects_dir = os.path.join(self.directory, 'objects')
+    if os.path.isdir(objects_dir):
+      for prefix in os.listdir(objects_dir):
+        for sha256 in os.listdir(os.path.join(objects_dir, prefix)):
+          if sha256 not in referenced:
+            os.remove(os.path.join(objects_dir, prefix, sha256))
+            removed_objects += 1
+    return removed_entries, removed_objects
+
+  def _entry_path(self, url):
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(self.directory, 'urls', key + '.json')
+
+  def _object_path(self, sha256):
+    return os.path.join(self.directory, 'objects', sha256[:2], sha256)
+
+
+def _read_json(path):
+  try:
+    with open(path) as f:
+      return json.load(f)
+  except (IOError, ValueError):
+    return None
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(
+      description='Inspect and prune the github_sample download cache.')
+  parser.add_argument('directory', help='Path to the cache directory.')
+  subparsers = parser.add_subparsers(dest='command')
+  subparsers.required = True
+
+  subparsers.add_parser('list', help='List the cached URLs.')
+
+  prune_parser = subparsers.add_parser(
+      'prune', help='Remove cached URLs and unreferenced contents.')
+  prune_parser.add_argument(
+      '--max-age',
+      type=float,
+      help='Only remove URLs not checked in this many seconds, '
+           'defaults to removing everything.',
+  )
+
+  args = parser.parse_args(argv)
+  cache = GithubCache(args.directory)
+  if args.command == 'list':
+    now = time.time()
+    for entry in cache.entries():
+      print('{}  checked {:.0f}s ago  etag={}  {}'.format(
+          entry['sha256'][:12], now - entry['checked'],
+          entry.get('etag'), entry['url']))
+  elif args.command == 'prune':
+    removed_entries, removed_objects = cache.prune(args.max_age)
+    print('Removed {} URLs and {} files.'.format(removed_entries, removed_objects))
+
+
+if __name__ == '__main__':
+  main()
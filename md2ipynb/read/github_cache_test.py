@@ -0,0 +1,81 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import tempfile
+import unittest
+
+from . import GithubCache
+
+url = 'https://raw.githubusercontent.com/owner/repo/master/file.py'
+
+
+class FakeResponse(object):
+  def __init__(self, status_code, text='', headers=None):
+    self.status_code = status_code
+    self.text = text
+    self.headers = headers or {}
+
+
+class FakeGet(object):
+  def __init__(self, text, etag):
+    self.text = text
+    self.etag = etag
+    self.requests = []
+
+  def __call__(self, url, params=None, headers=None):
+    self.requests.append(headers)
+    if headers.get('If-None-Match') == self.etag:
+      return FakeResponse(304)
+    return FakeResponse(200, self.text, {'ETag': self.etag})
+
+
+class GithubCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.directory = self.temp_dir.name
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def test_get_downloads_once(self):
+    get = FakeGet('contents', '"v1"')
+    self.assertEqual('contents', GithubCache(self.directory).get(url, get=get))
+    self.assertEqual([{}], get.requests)
+
+    # A new cache instance, like in a new process, only revalidates.
+    self.assertEqual('contents', GithubCache(self.directory).get(url, get=get))
+    self.assertEqual([{}, {'If-None-Match': '"v1"'}], get.requests)
+
+  def test_get_modified(self):
+    GithubCache(self.directory).get(url, get=FakeGet('old', '"v1"'))
+    get = FakeGet('new', '"v2"')
+    self.assertEqual('new', GithubCache(self.directory).get(url, get=get))
+    self.assertEqual('"v2"', GithubCache(self.directory).entry(url)['etag'])
+
+  def test_get_ttl(self):
+    get = FakeGet('contents', '"v1"')
+    GithubCache(self.directory).get(url, get=get)
+    self.assertEqual('contents', GithubCache(self.directory, ttl=60).get(url, get=get))
+    self.assertEqual(1, len(get.requests))
+
+  def test_prune(self):
+    cache = GithubCache(self.directory)
+    cache.get(url, get=FakeGet('contents', '"v1"'))
+    self.assertEqual((0, 0), cache.prune(max_age=60))
+    self.assertEqual(1, len(list(cache.entries())))
+    self.assertEqual((1, 1), cache.prune())
+    self.assertEqual([], list(cache.entries()))
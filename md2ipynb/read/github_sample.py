@@ -15,14 +15,20 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import concurrent.futures
+import functools
+import logging
 import re
-import requests
 
+from jinja2 import TemplateNotFound
 from jinja2 import TemplateSyntaxError
 from jinja2 import lexer
 from jinja2 import nodes
 from jinja2.ext import Extension
 
+from . import dependencies
+from . import http_session
+
 github_file_cache = {}
 
 
@@ -34,6 +40,23 @@ class GithubSampleExt(Extension):
   # A set of names that trigger the extension.
   tags = set(['github_sample'])
 
+  def __init__(self, environment):
+    super(GithubSampleExt, self).__init__(environment)
+
+    # An optional on-disk GithubCache shared across processes.
+    # Samples are downloaded concurrently before rendering with
+    # up to `github_prefetch_workers` threads, 0 disables it.
+    # Failed requests are retried `github_retries` times with an exponential
+    # backoff, or as long as the server asks with a Retry-After header,
+    # waiting at most http_session.MAX_RETRY_DELAY seconds each time.
+    environment.extend(
+        github_cache=None,
+        github_prefetch_workers=8,
+        github_timeout=http_session.DEFAULT_TIMEOUT,
+        github_retries=http_session.DEFAULT_RETRIES,
+        github_backoff_factor=http_session.DEFAULT_BACKOFF_FACTOR,
+    )
+
   def parse(self, parser):
     lineno = next(parser.stream).lineno
 
@@ -67,37 +90,147 @@ class GithubSampleExt(Extension):
     return nodes.CallBlock(call, [], [], []).set_lineno(lineno)
 
   def _github_sample(self, owner, repo, branch, path, tag, caller):
-    url = 'https://raw.githubusercontent.com/{}/{}/{}/{}'.format(
-        owner, repo, branch, path)
+    url = github_url(owner, repo, branch, path)
+    dependencies.add_url(url, branch)
     if url in github_file_cache:
       github_file = github_file_cache[url]
     else:
-      req = requests.get(url, params={'ref': branch})
-      assert req.status_code == requests.codes.ok, '{} {}, contents:\n{}'.format(
-          req, url, req.text)
-      github_file = req.text
+      github_file = fetch(
+          url, branch, self.environment.github_cache, http_get(self.environment))
       github_file_cache[url] = github_file
     return extract_snippet(github_file, tag)
 
 
+def github_url(owner, repo, branch, path):
+  return 'https://raw.githubusercontent.com/{}/{}/{}/{}'.format(
+      owner, repo, branch, path)
+
+
+# Format: {% github_sample /<owner>/<repo>/blob/<branch>/<path> tag:<tag> %}
+github_sample_tag_re = re.compile(
+    r'{%-?\s*github_sample\s+/([^/\s]+)/([^/\s]+)/blob/([^/\s]+)/([\w/.-]+)')
+
+# Format: {% include "path/to/file" %}
+include_tag_re = re.compile(r'''{%-?\s*include\s+(['"])([^'"]+)\1''')
+
+
+def find_github_samples(env, source, visited=None):
+  # Yields the (owner, repo, branch, path) of every {% github_sample %}
+  # in a template source and all of its static includes.
+  # This scans the source instead of parsing it, so it's still cheap
+  # when the compiled template comes from the bytecode cache.
+  visited = visited if visited is not None else set()
+  for m in github_sample_tag_re.finditer(source):
+    yield m.groups()
+
+  for m in include_tag_re.finditer(source):
+    name = m.group(2)
+    if name in visited:
+      continue
+    visited.add(name)
+    try:
+      include_source, _, _ = env.loader.get_source(env, name)
+    except TemplateNotFound:
+      continue
+    for sample in find_github_samples(env, include_source, visited):
+      yield sample
+
+
+def prefetch(env, source):
+  # Downloads all the github samples of a template concurrently,
+  # so rendering doesn't wait for them one by one.
+  max_workers = getattr(env, 'github_prefetch_workers', 0)
+  if not max_workers:
+    return
+
+  samples = {}
+  for owner, repo, branch, path in find_github_samples(env, source):
+    url = github_url(owner, repo, branch, path)
+    if url not in github_file_cache:
+      samples[url] = branch
+  if not samples:
+    return
+
+  github_cache = getattr(env, 'github_cache', None)
+  get = http_get(env)
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=min(max_workers, len(samples))) as executor:
+    futures = {
+        executor.submit(fetch, url, branch, github_cache, get): url
+        for url, branch in samples.items()
+    }
+    for future in concurrent.futures.as_completed(futures):
+      url = futures[future]
+      try:
+        github_file_cache[url] = future.result()
+      except Exception as e:
+        # Leave it to the render to fetch it again and report the error.
+        logging.debug('failed to prefetch {}: {}'.format(url, e))
+
+
+def http_get(env):
+  return functools.partial(
+      http_session.get,
+      timeout=env.github_timeout,
+      retries=env.github_retries,
+      backoff_factor=env.github_backoff_factor,
+  )
+
+
+def fetch(url, branch, github_cache=None, get=None):
+  get = get or http_session.get
+  if github_cache:
+    return github_cache.get(url, params={'ref': branch}, get=get)
+  return get(url, params={'ref': branch}).text
+
+
 def extract_snippet(source, tag):
-  tag_start_re = re.compile(r'\[\s*START\s+{}\s*\]'.format(tag))
-  tag_end_re = re.compile(r'\[\s*END\s+{}\s*\]'.format(tag))
+  return region_tags(source).get(tag, '')
 
-  started = False
-  min_indent = float('Inf')
-  snippet = []
+
+# Format: [START tag] or [END tag]
+region_tag_re = re.compile(r'\[\s*(START|END)\s+([^\]]*?)\s*\]')
+
+
+@functools.lru_cache(maxsize=128)
+def region_tags(source):
+  # Indexes all the region tags of a file in a single pass,
+  # returns a dict of {tag: dedented_snippet}.
+  # Only the first region of each tag is used, and a region
+  # without an [END tag] goes until the end of the file.
+  snippets = {}
+  open_regions = {}
   for line in source.splitlines():
-    if not started and tag_start_re.search(line):
-      started = True
-    elif started:
-      if tag_end_re.search(line):
-        break
-      snippet.append(line)
-      if line.strip():
-        indent = len(line) - len(line.lstrip())
-        min_indent = min(indent, min_indent)
+    starts = []
+    ends = set()
+    if 'START' in line or 'END' in line:
+      for m in region_tag_re.finditer(line):
+        if m.group(1) == 'START':
+          starts.append(m.group(2))
+        elif m.group(2) in open_regions:
+          ends.add(m.group(2))
+
+    for tag, snippet in open_regions.items():
+      if tag not in ends:
+        snippet.append(line)
+    for tag in ends:
+      snippets[tag] = dedent(open_regions.pop(tag))
+    for tag in starts:
+      if tag not in snippets and tag not in open_regions:
+        open_regions[tag] = []
+
+  for tag, snippet in open_regions.items():
+    snippets[tag] = dedent(snippet)
+  return snippets
+
+
+def dedent(lines):
+  min_indent = float('Inf')
+  for line in lines:
+    if line.strip():
+      indent = len(line) - len(line.lstrip())
+      min_indent = min(indent, min_indent)
 
   if min_indent != float('Inf'):
-    snippet = [line[min_indent:] for line in snippet]
-  return '\n'.join(snippet)
+    lines = [line[min_indent:] for line in lines]
+  return '\n'.join(lines)
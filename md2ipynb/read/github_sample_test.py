@@ -16,15 +16,29 @@
 # under the License.
 
 import jinja2
+import tempfile
 import unittest
 
+from unittest.mock import patch
+
+from md2ipynb import testing
+
 from . import MarkdownLoader
 from . import GithubSampleExt
+from . import github_sample
 from .github_sample import extract_snippet
 
 title = 'Github sample'
 
 
+def setUpModule():
+  testing.no_github_retries.start()
+
+
+def tearDownModule():
+  testing.no_github_retries.stop()
+
+
 class GithubSampleExtTest(unittest.TestCase):
   def test_github_sample(self):
     env = jinja2.Environment(loader=MarkdownLoader(), extensions=[GithubSampleExt])
@@ -45,6 +59,54 @@ class GithubSampleExtTest(unittest.TestCase):
     self.assertEqual(expected, actual)
 
 
+class PrefetchTest(unittest.TestCase):
+  def setUp(self):
+    self.env = jinja2.Environment(loader=MarkdownLoader(), extensions=[GithubSampleExt])
+    self.include = tempfile.NamedTemporaryFile('w')
+    self.include.write('{% github_sample /owner/repo/blob/master/c.py tag:c %}')
+    self.include.flush()
+    self.source = '\n'.join([
+        '{% github_sample /owner/repo/blob/master/a.py tag:a1 %}',
+        '{% github_sample /owner/repo/blob/master/a.py tag:a2 %}',
+        '{% github_sample /owner/repo/blob/dev/b.py tag:b %}',
+        "{% include '" + self.include.name + "' %}",
+        '{% include some_variable %}',
+    ])
+
+  def tearDown(self):
+    self.include.close()
+    for url in list(github_sample.github_file_cache):
+      if '/owner/repo/' in url:
+        del github_sample.github_file_cache[url]
+
+  def test_find_github_samples(self):
+    expected = [
+        ('owner', 'repo', 'master', 'a.py'),
+        ('owner', 'repo', 'master', 'a.py'),
+        ('owner', 'repo', 'dev', 'b.py'),
+        ('owner', 'repo', 'master', 'c.py'),
+    ]
+    actual = list(github_sample.find_github_samples(self.env, self.source))
+    self.assertEqual(expected, actual)
+
+  def test_prefetch(self):
+    def fetch(url, branch, github_cache=None, get=None):
+      return '{} {}'.format(branch, url)
+
+    with patch.object(github_sample, 'fetch', side_effect=fetch) as mock_fetch:
+      github_sample.prefetch(self.env, self.source)
+      github_sample.prefetch(self.env, self.source)
+    self.assertEqual(3, mock_fetch.call_count)
+    url = github_sample.github_url('owner', 'repo', 'dev', 'b.py')
+    self.assertEqual('dev ' + url, github_sample.github_file_cache[url])
+
+  def test_prefetch_disabled(self):
+    self.env.github_prefetch_workers = 0
+    with patch.object(github_sample, 'fetch') as mock_fetch:
+      github_sample.prefetch(self.env, self.source)
+    self.assertEqual(0, mock_fetch.call_count)
+
+
 class ExtractSnippetTest(unittest.TestCase):
   def test_extract_snippet(self):
     expected = "print('Hello')"
@@ -78,3 +140,39 @@ class ExtractSnippetTest(unittest.TestCase):
         tag='region_tag',
     )
     self.assertEqual(expected, actual)
+
+  def test_extract_snippet_multiple_tags(self):
+    source = '\n'.join([
+        '# [START outer]',
+        'def f():',
+        '  # [START inner]',
+        '  return 1',
+        '  # [END inner]',
+        '# [END outer]',
+        '# [START unfinished]',
+        'x = 1',
+    ])
+    self.assertEqual('\n'.join([
+        'def f():',
+        '  # [START inner]',
+        '  return 1',
+        '  # [END inner]',
+    ]), extract_snippet(source, 'outer'))
+    self.assertEqual('return 1', extract_snippet(source, 'inner'))
+    self.assertEqual('x = 1', extract_snippet(source, 'unfinished'))
+    self.assertEqual('', extract_snippet(source, 'missing'))
+
+  def test_extract_snippet_first_region(self):
+    expected = 'first'
+    actual = extract_snippet(
+        source='\n'.join([
+            '[START region_tag]',
+            'first',
+            '[END region_tag]',
+            '[START region_tag]',
+            'second',
+            '[END region_tag]',
+        ]),
+        tag='region_tag',
+    )
+    self.assertEqual(expected, actual)
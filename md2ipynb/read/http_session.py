@@ -0,0 +1,93 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+import threading
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds.
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_RETRIES = 5
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Longest wait in seconds before a retry, also when a server
+# asks for longer with a Retry-After header.
+MAX_RETRY_DELAY = 30
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class FetchError(Exception):
+  def __init__(self, url, message, status_code=None):
+    super(FetchError, self).__init__('{}: {}'.format(url, message))
+    self.url = url
+    self.status_code = status_code
+
+
+class CappedRetry(Retry):
+  # urllib3 caps the exponential backoff, but waits as long as
+  # a Retry-After header asks for, which could stall a build.
+  def get_backoff_time(self):
+    return min(super(CappedRetry, self).get_backoff_time(), MAX_RETRY_DELAY)
+
+  def get_retry_after(self, response):
+    retry_after = super(CappedRetry, self).get_retry_after(response)
+    if retry_after is None:
+      return None
+    return min(retry_after, MAX_RETRY_DELAY)
+
+
+def session(retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR):
+  # Sessions keep their connections alive, so they are shared by all
+  # the requests in a process, including requests from multiple threads.
+  key = (os.getpid(), retries, backoff_factor)
+  with _sessions_lock:
+    if key not in _sessions:
+      retry = CappedRetry(
+          total=retries,
+          backoff_factor=backoff_factor,
+          status_forcelist=RETRY_STATUS_CODES,
+          allowed_methods=['GET'],
+          respect_retry_after_header=True,
+          raise_on_status=False,
+      )
+      adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+      new_session = requests.Session()
+      new_session.mount('https://', adapter)
+      new_session.mount('http://', adapter)
+      _sessions[key] = new_session
+    return _sessions[key]
+
+
+def get(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES, backoff_factor=DEFAULT_BACKOFF_FACTOR):
+  # Returns a successful or "304 Not Modified" response,
+  # otherwise raises a FetchError once all the retries are exhausted.
+  try:
+    req = session(retries, backoff_factor).get(
+        url, params=params, headers=headers, timeout=timeout)
+  except requests.RequestException as e:
+    raise FetchError(url, str(e))
+  if req.status_code not in (requests.codes.ok, requests.codes.not_modified):
+    raise FetchError(
+        url, '{} {}'.format(req.status_code, req.reason), req.status_code)
+  return req
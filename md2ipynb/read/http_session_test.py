@@ -0,0 +1,80 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import requests
+import unittest
+
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from . import http_session
+from .http_session import FetchError
+
+url = 'https://raw.githubusercontent.com/owner/repo/master/file.py'
+
+
+def response(status_code, reason=''):
+  return Mock(status_code=status_code, reason=reason)
+
+
+class HttpSessionTest(unittest.TestCase):
+  def test_session_shared(self):
+    self.assertIs(http_session.session(), http_session.session())
+    self.assertIsNot(http_session.session(), http_session.session(retries=0))
+
+  def test_session_retries(self):
+    retry = http_session.session(retries=3).get_adapter(url).max_retries
+    self.assertEqual(3, retry.total)
+    self.assertTrue(retry.respect_retry_after_header)
+    self.assertIn(429, retry.status_forcelist)
+    self.assertIn(503, retry.status_forcelist)
+
+  def test_retry_delay_capped(self):
+    retry = http_session.session(retries=10).get_adapter(url).max_retries
+    for _ in range(8):
+      retry = retry.increment('GET', url)
+    self.assertEqual(http_session.MAX_RETRY_DELAY, retry.get_backoff_time())
+    too_long = Mock(headers={'Retry-After': '3600'})
+    self.assertEqual(
+        http_session.MAX_RETRY_DELAY, retry.get_retry_after(too_long))
+    short = Mock(headers={'Retry-After': '2'})
+    self.assertEqual(2, retry.get_retry_after(short))
+
+  def test_get(self):
+    session = Mock()
+    session.get.return_value = response(200)
+    with patch.object(http_session, 'session', return_value=session):
+      self.assertEqual(200, http_session.get(url, timeout=(1, 2)).status_code)
+    session.get.assert_called_once_with(
+        url, params=None, headers=None, timeout=(1, 2))
+
+  def test_get_error_status(self):
+    session = Mock()
+    session.get.return_value = response(404, 'Not Found')
+    with patch.object(http_session, 'session', return_value=session):
+      with self.assertRaises(FetchError) as context:
+        http_session.get(url)
+    self.assertEqual(404, context.exception.status_code)
+    self.assertEqual(url, context.exception.url)
+
+  def test_get_connection_error(self):
+    session = Mock()
+    session.get.side_effect = requests.ConnectionError('connection refused')
+    with patch.object(http_session, 'session', return_value=session):
+      with self.assertRaises(FetchError) as context:
+        http_session.get(url)
+    self.assertIsNone(context.exception.status_code)
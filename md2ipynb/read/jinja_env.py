@@ -0,0 +1,57 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import jinja2
+import os
+
+from md2ipynb.version import __version__
+
+from . import GithubSampleExt
+from . import MarkdownLoader
+
+
+def new_jinja_env(
+    include_dir=None,
+    github_cache=None,
+    github_timeout=None,
+    github_retries=None,
+    bytecode_cache_dir=None,
+    fast_path=True,
+):
+  env = jinja2.Environment(
+      loader=MarkdownLoader(include_dir, fast_path=fast_path),
+      extensions=[GithubSampleExt],
+      bytecode_cache=bytecode_cache(bytecode_cache_dir),
+  )
+  env.github_cache = github_cache
+  if github_timeout is not None:
+    env.github_timeout = github_timeout
+  if github_retries is not None:
+    env.github_retries = github_retries
+  return env
+
+
+def bytecode_cache(directory):
+  if not directory:
+    return None
+  os.makedirs(directory, exist_ok=True)
+
+  # Jinja checks the bucket against a checksum of the preprocessed source,
+  # but the compiled code also depends on how md2ipynb preprocesses it and
+  # on the GithubSampleExt, so the cache files are separated by version.
+  return jinja2.FileSystemBytecodeCache(
+      directory, pattern='md2ipynb-{}-%s.cache'.format(__version__))
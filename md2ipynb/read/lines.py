@@ -15,38 +15,166 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import fileinput
-import jinja2
-import tempfile
-from io import StringIO
+import io
+import re
+import sys
 
 from . import MarkdownLoader
-from . import GithubSampleExt
+from . import dependencies
+from . import new_jinja_env
+from .github_sample import prefetch
+from .markdown_loader import needs_jinja
+
+# The line boundaries of str.splitlines() other than '\n', and the
+# whitespace that str.rstrip() removes at the end of each line.
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+line_break_re = re.compile(r'\r\n|[{}]'.format(LINE_BREAKS[1:]))
+trailing_whitespace_re = re.compile(r'[^\S\n]+(?=\n|\Z)')
+
+# Rendered lines are joined into blocks of about this many lines.
+BLOCK_LINES = 4096
 
 
 def lines(input_file='-', variables=None, include_dir=None, jinja_env=None):
+  for block in blocks(input_file, variables, include_dir, jinja_env):
+    for line in block.split('\n'):
+      yield line
+
+
+def blocks(input_file='-', variables=None, include_dir=None, jinja_env=None):
+  # Like lines(), but yields them in blocks of '\n' joined lines,
+  # so they can be scanned without going through each line in Python.
   if not jinja_env:
-    jinja_env = jinja2.Environment(
-        loader=MarkdownLoader(include_dir),
-        extensions=[GithubSampleExt],
-    )
+    jinja_env = new_jinja_env(include_dir)
 
   # Read from a file, stdin or an iterable without any trailing newlines.
   if isinstance(input_file, str):
     # If input_file is '-', fileinput.input() will read from stdin.
     # Otherwise, it will open the file path.
-    lines = [line.rstrip() for line in fileinput.input(input_file)]
+    if input_file == '-':
+      source = read_text(sys.stdin)
+      name = '<stdin>'
+    else:
+      dependencies.add_file(input_file)
+      with open(input_file) as f:
+        source = read_text(f)
+      name = input_file
   else:
-    lines = [line.rstrip() for line in input_file]
+    source = join_lines(input_file)
+    name = '<string>'
 
   # jinja_env.from_string() doesn't apply the MarkdownLoader,
-  # so we create a named temporary file instead.
-  with tempfile.NamedTemporaryFile('w') as f:
-    f.write('\n'.join(lines))
-    f.seek(0)
-    input_template = jinja_env.get_template(f.name)
-
-  # Render the template and yield the lines.
-  source = input_template.render(variables or {})
-  for line in source.splitlines():
-    yield line.rstrip()
+  # so we preprocess the source in memory before compiling it.
+  loader = jinja_env.loader
+  if not isinstance(loader, MarkdownLoader):
+    loader = MarkdownLoader()
+  source = loader.preprocess(source)
+
+  # Plain markdown doesn't need to be compiled or rendered.
+  if loader.fast_path and not needs_jinja(jinja_env, source):
+    for block in iter_blocks(source):
+      yield block
+    return
+
+  # Download all the github samples before rendering.
+  prefetch(jinja_env, source)
+  input_template = template_from_source(jinja_env, source, name)
+
+  # Render the template incrementally, yielding each block of lines as
+  # soon as it's rendered instead of holding the whole rendered document.
+  batch = []
+  for line in split_lines(input_template.generate(variables or {})):
+    batch.append(line.rstrip())
+    if len(batch) >= BLOCK_LINES:
+      yield '\n'.join(batch)
+      batch = []
+  if batch:
+    yield '\n'.join(batch)
+
+
+def join_lines(lines, batch_size=4096):
+  # Like '\n'.join(line.rstrip() for line in lines), but only a batch
+  # of the lines is kept in a list at a time.
+  buffer = io.StringIO()
+  batch = []
+  separator = ''
+  for line in lines:
+    batch.append(line.rstrip())
+    if len(batch) >= batch_size:
+      buffer.write(separator + '\n'.join(batch))
+      batch = []
+      separator = '\n'
+  if batch:
+    buffer.write(separator + '\n'.join(batch))
+  return buffer.getvalue()
+
+
+def read_text(f, chunk_size=1 << 16):
+  # Like join_lines(f), but reads a chunk of whole lines at a time and
+  # strips them with a regex substitution instead of a loop over lines.
+  buffer = io.StringIO()
+  ends_with_newline = False
+  while True:
+    chunk = f.read(chunk_size)
+    if not chunk:
+      break
+    chunk += f.readline()
+    buffer.write(trailing_whitespace_re.sub('', chunk))
+    ends_with_newline = chunk.endswith('\n')
+  text = buffer.getvalue()
+  # A newline at the end of the file doesn't start another line.
+  return text[:-1] if ends_with_newline else text
+
+
+def iter_blocks(text, block_size=1 << 16):
+  # Like '\n'.join(line.rstrip() for line in text.splitlines()), in blocks
+  # of lines, and with regex substitutions instead of a loop over lines.
+  # Blocks always end after a '\n', which is a line ending for splitlines().
+  start = 0
+  while start < len(text):
+    end = text.find('\n', start + block_size)
+    end = len(text) if end < 0 else end + 1
+    piece = text[start:end]
+    block = trailing_whitespace_re.sub('', line_break_re.sub('\n', piece))
+    # A line break at the end of the block doesn't start another line.
+    yield block[:-1] if piece[-1] in LINE_BREAKS else block
+    start = end
+
+
+def split_lines(chunks):
+  # Like ''.join(chunks).splitlines(), but yields each line as soon as
+  # its line ending is found.
+  pending = []
+  after_cr = False
+  for chunk in chunks:
+    for part in chunk.splitlines(True):
+      if after_cr:
+        after_cr = False
+        if part == '\n':
+          # A '\r\n' line ending split across two chunks.
+          continue
+      line = part.splitlines()[0]
+      pending.append(line)
+      if len(line) < len(part):
+        yield ''.join(pending)
+        pending = []
+        after_cr = part.endswith('\r')
+  if pending:
+    yield ''.join(pending)
+
+
+def template_from_source(jinja_env, source, name):
+  # Like jinja2.BaseLoader.load(), but from an already loaded source.
+  # This uses the bytecode cache if the environment has one.
+  bcc = jinja_env.bytecode_cache
+  code = None
+  if bcc is not None:
+    bucket = bcc.get_bucket(jinja_env, name, None, source)
+    code = bucket.code
+  if code is None:
+    code = jinja_env.compile(source, name)
+    if bcc is not None:
+      bucket.code = code
+      bcc.set_bucket(bucket)
+  return jinja_env.template_class.from_code(
+      jinja_env, code, jinja_env.make_globals(None), None)
@@ -15,14 +15,25 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import itertools
 import jinja2
 import json
+import os
+import tempfile
 import unittest
 
 from io import StringIO
 from unittest.mock import patch
 
+from md2ipynb import testing
+
 from . import lines
+from . import new_jinja_env
+from .lines import blocks
+from .lines import iter_blocks
+from .lines import join_lines
+from .lines import read_text
+from .lines import split_lines
 
 source_file = 'test/hello.md'
 expected_file = 'test/hello-expected.md'
@@ -36,6 +47,14 @@ with open(variables_file) as f:
   variables = json.load(f)
 
 
+def setUpModule():
+  testing.no_github_retries.start()
+
+
+def tearDownModule():
+  testing.no_github_retries.stop()
+
+
 class ReadLinesTest(unittest.TestCase):
   def test_from_iterable(self):
     actual = '\n'.join(lines(source.splitlines(), variables))
@@ -58,3 +77,87 @@ class ReadLinesTest(unittest.TestCase):
         .splitlines()
     ))
     self.assertEqual(expected, actual)
+
+  def test_bytecode_cache(self):
+    source = ["{% include 'test/title.md' %}", 'Hello {{name}}!']
+    expected = '# Title\nHello world!'
+    with tempfile.TemporaryDirectory() as cache_dir:
+      env = new_jinja_env(bytecode_cache_dir=cache_dir)
+      actual = '\n'.join(lines(source, {'title': 'Title', 'name': 'world'}, jinja_env=env))
+      self.assertEqual(expected, actual)
+      self.assertEqual(2, len(os.listdir(cache_dir)))
+
+      # A new environment, like in a new process, doesn't compile anything.
+      env = new_jinja_env(bytecode_cache_dir=cache_dir)
+      with patch.object(env, 'compile', side_effect=AssertionError('compiled')):
+        actual = '\n'.join(lines(source, {'title': 'Title', 'name': 'world'}, jinja_env=env))
+      self.assertEqual(expected, actual)
+
+  def test_iterable_without_files(self):
+    with patch('builtins.open', side_effect=AssertionError('opened a file')):
+      actual = '\n'.join(lines(['# {{ title }}', '<!-- comment -->', 'Hello'], {'title': 'Title'}))
+    self.assertEqual('# Title\nHello', actual)
+
+  def test_fast_path_skips_jinja(self):
+    env = new_jinja_env()
+    with patch.object(env, 'compile', side_effect=AssertionError('compiled')):
+      actual = '\n'.join(lines(['# Title', '', 'Hello world!'], jinja_env=env))
+    self.assertEqual('# Title\n\nHello world!', actual)
+
+  def test_blocks(self):
+    # Plain markdown skips Jinja, a template is rendered.
+    self.assertEqual(
+        ['# Title\n\nHello world!'],
+        list(blocks(['# Title  ', '', 'Hello world!'])))
+    self.assertEqual(
+        ['# Title\n\nHello world!'],
+        list(blocks(['# Title  ', '', 'Hello {{ name }}!'], {'name': 'world'})))
+    with patch('md2ipynb.read.lines.BLOCK_LINES', 2):
+      self.assertEqual(
+          ['# Title\n', 'Hello world!'],
+          list(blocks(['# Title', '', 'Hello {{ name }}!'], {'name': 'world'})))
+
+  def test_no_fast_path(self):
+    env = new_jinja_env(fast_path=False)
+    with patch.object(env, 'compile', wraps=env.compile) as compile:
+      actual = '\n'.join(lines(['# Title', '', 'Hello world!'], jinja_env=env))
+    self.assertEqual('# Title\n\nHello world!', actual)
+    self.assertEqual(1, compile.call_count)
+
+
+class SplitLinesTest(unittest.TestCase):
+  def test_split_lines(self):
+    chunks = ['', 'a', 'b\nc', '\n', '\nd\r', '\ne\r', 'f\r\n\r\n', 'g']
+    expected = ''.join(chunks).splitlines()
+    actual = list(split_lines(chunks))
+    self.assertEqual(expected, actual)
+
+  def test_split_lines_incremental(self):
+    def chunks():
+      yield 'line 1\nline'
+      yield ' 2\n'
+      raise AssertionError('too many chunks consumed')
+    self.assertEqual(['line 1', 'line 2'], list(itertools.islice(split_lines(chunks()), 2)))
+
+  def test_iter_blocks(self):
+    text = 'a\nb\r\nc\rd\n\n\ne  \n\x0c \r\x1e\u2028f\t'
+    expected = [line.rstrip() for line in text.splitlines()]
+    for block_size in [0, 1, 3, 100]:
+      actual = [line for block in iter_blocks(text, block_size)
+                for line in block.split('\n')]
+      self.assertEqual(expected, actual)
+    self.assertEqual(['a'], list(iter_blocks('a\n')))
+    self.assertEqual([], list(iter_blocks('')))
+
+  def test_join_lines(self):
+    lines = ['a  \n', '\n', 'b\n', '', 'c']
+    expected = '\n'.join(line.rstrip() for line in lines)
+    for batch_size in [1, 2, 100]:
+      self.assertEqual(expected, join_lines(iter(lines), batch_size))
+    self.assertEqual('', join_lines([]))
+
+  def test_read_text(self):
+    for text in ['a  \n\nb \t\n\n', 'a\n  ', 'a\x0c\nb', '\n', '']:
+      expected = join_lines(StringIO(text))
+      for chunk_size in [1, 2, 100]:
+        self.assertEqual(expected, read_text(StringIO(text), chunk_size))
@@ -15,109 +15,267 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import collections
 import html2md
 import jinja2
 import os
 import re
+import sys
+import threading
+
+from . import dependencies
+
+
+class SourceCache(object):
+  # LRU cache of preprocessed sources by path, only valid while the file's
+  # mtime and size don't change. The least recently used sources are evicted
+  # once they add up to more than `max_bytes` in memory.
+  def __init__(self, max_bytes=64 * 1024 * 1024):
+    self.max_bytes = max_bytes
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self._entries = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, path, mtime, size):
+    with self._lock:
+      entry = self._entries.get(path)
+      if entry and entry[:2] == (mtime, size):
+        self._entries.move_to_end(path)
+        self.hits += 1
+        return entry[2]
+      self.misses += 1
+      return None
+
+  def put(self, path, mtime, size, source):
+    source_size = sys.getsizeof(source)
+    with self._lock:
+      self._remove(path)
+      if source_size > self.max_bytes:
+        return
+      self._entries[path] = (mtime, size, source)
+      self.size += source_size
+      while self.size > self.max_bytes:
+        self._remove(next(iter(self._entries)))
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self.size = 0
+      self.hits = 0
+      self.misses = 0
+
+  def stats(self):
+    with self._lock:
+      return {
+          'entries': len(self._entries),
+          'size': self.size,
+          'hits': self.hits,
+          'misses': self.misses,
+      }
+
+  def _remove(self, path):
+    entry = self._entries.pop(path, None)
+    if entry:
+      self.size -= sys.getsizeof(entry[2])
+
+
+# Shared by all the MarkdownLoaders in a process.
+source_cache = SourceCache()
 
 
 class MarkdownLoader(jinja2.BaseLoader):
-  def __init__(self, searchpath=None):
+  def __init__(self, searchpath=None, source_cache=source_cache, fast_path=True):
     self.searchpath = searchpath or '.'
+    self.source_cache = source_cache
+    self.fast_path = fast_path
 
   def get_source(self, env, name):
     path = os.path.join(self.searchpath, name)
-    if not os.path.exists(path):
+    # Missing includes are dependencies too, they can be created later.
+    dependencies.add_file(path)
+    try:
+      stat = os.stat(path)
+    except OSError:
       raise jinja2.TemplateNotFound(path)
 
-    mtime = os.path.getmtime(path)
-    with open(path) as f:
-      source = f.read()
+    mtime = stat.st_mtime
+    source = None
+    if self.source_cache is not None:
+      cache_key = (
+          (os.path.abspath(path), self.fast_path),
+          stat.st_mtime_ns,
+          stat.st_size,
+      )
+      source = self.source_cache.get(*cache_key)
+    if source is None:
+      with open(path) as f:
+        source = self.preprocess(f.read())
+      if self.source_cache is not None:
+        self.source_cache.put(*cache_key, source)
+
+    def uptodate():
+      # Jinja checks this before reusing a cached template.
+      dependencies.add_file(path)
+      return mtime == os.path.getmtime(path)
+    return source, path, uptodate
+
+  def preprocess(self, source):
+    if self.fast_path and not needs_html2md(source):
+      # Without any HTML, html2md only collapses multiple empty lines.
+      source = multiple_newlines_re.sub('\n\n', source).strip()
+    else:
       if '<body>' not in source:
         source = '<body>{}</body>'.format(source)
       source = html2md.convert(source)
 
     # Normalize source code before applying any templating logic.
-    source = remove_html_comments(source)
-    source = normalize_inline_code_block(source)
-    source = jekyll_liquid_capture(source)
-    source = jekyll_liquid_include(source)
-    return source, path, lambda: mtime == os.path.getmtime(path)
-
-  
-def replace(source, regex, fn):
-  replacements = {
-      m.group(0): fn(m)
-      for m in regex.finditer(source)
-  }
-  for old, new in replacements.items():
-    source = source.replace(old, new)
-  return source
-
-
-def remove_html_comments(source):
-  html_comments_re = re.compile(r'''
-      (\s*)?                # 0: whitespaces before
-      <!--(?:(?!-->).)*-->  # <!-- comment -->
-      (\s*)?                # 1: whitespaces after
-  ''', re.VERBOSE | re.DOTALL)
-  def fn(m):
-    if '\n' in (m[0] or '') + (m[1] or ''):
-      return '\n'
-    return ' '
-  return replace(source, html_comments_re, fn).strip('\n')
+    return normalize(source)
 
 
-def normalize_inline_code_block(source):
-  code_block_re = re.compile(r'''
-      ^((?:{:\s*[^}]+})?```)  # group 1: initial ``` OR {:.class}```
-      ((?:(?!(?:```$)).)*?)   # group 2: everything until \n```
-      \n?```$                 # ending ```
-  ''', re.VERBOSE | re.MULTILINE | re.DOTALL)
+# Characters that html2md converts: HTML tags and entities,
+# carriage returns, and control characters.
+html_re = re.compile(r'[<&\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+multiple_newlines_re = re.compile(r'\n\n\n+')
 
-  # Normalize inline code block finish backticks into next line, example:
-  # ```
-  # {% github_sample path/to/file tag:tag % }```
-  return code_block_re.sub(r'\1\2\n```', source)
 
+def needs_html2md(source):
+  return html_re.search(source) is not None
 
-def jekyll_liquid_capture(source):
-  jekyll_liquid_capture_re = re.compile(r'''
-      {%\s*capture\s+(?P<name>\w+)\s*%}         # {% capture variable_name %}
-      (?P<body>(?:(?!{%\s*endcapture\s*%}).)*)  # Everything until endcapture
-      {%\s*endcapture\s*%}                      # {% endcapture %}
-  ''', re.VERBOSE | re.DOTALL)
 
-  def fn(m):
-    return (
-        '{{% set {} %}}'
-        '{}'
-        '{{% endset %}}'
-    ).format(m['name'], m['body'])
-  return replace(source, jekyll_liquid_capture_re, fn)
+def needs_jinja(env, source):
+  # Jinja renders a source without any template syntax as it is,
+  # except for the trailing newline and newline normalization.
+  if env.line_statement_prefix or env.line_comment_prefix or '\r' in source:
+    return True
+  return (
+      env.block_start_string in source or
+      env.variable_start_string in source or
+      env.comment_start_string in source
+  )
 
 
-def jekyll_liquid_include(source):
-  jekyll_liquid_include_re = re.compile(r'''
+# Every token starts with one of these, which the regex engine can search
+# for much faster than for the tokens themselves.
+token_start_re = re.compile(r'<!--|{%')
+
+# Tokens normalized in a single scan of the source.
+normalize_re = re.compile(r'''
+    (?P<comment><!--.*?-->)|                        # <!-- comment -->
+    (?P<capture>{%\s*capture\s+(?P<name>\w+)\s*%})|  # {% capture variable_name %}
+    (?P<endcapture>{%\s*endcapture\s*%})|            # {% endcapture %}
+    (?P<include>
       {%\s*include\s+
       (?P<file>"[^"]*"|[^\s]+)\s+                     # include_file
       (?P<args>(?:\w+\s*=\s*(?:"[^"]*"|[^\s]+)\s+)*)  # arg="text" arg=variable
       \s*%}
-  ''', re.VERBOSE)
-
-  jekyll_liquid_include_arg_re = re.compile(r'''
-      (?P<name>\w+)\s*=\s*(?P<value>"[^"]*"|[^\s]+)   # arg="text" arg=variable
-  ''', re.VERBOSE)
-
-  def fn(m):
-    include_file = m['file'].strip('\'"')
-    args = [
-        '"{}": {}'.format(arg['name'], arg['value'])
-        for arg in jekyll_liquid_include_arg_re.finditer(m['args'])
-    ]
-    return (
-        '{{% with include={{{}}} %}}'
-        '{{% include "{}" %}}'
-        '{{% endwith %}}'
-    ).format(', '.join(args), include_file)
-  return replace(source, jekyll_liquid_include_re, fn)
+    )
+''', re.VERBOSE | re.DOTALL)
+
+jekyll_liquid_include_arg_re = re.compile(r'''
+    (?P<name>\w+)\s*=\s*(?P<value>"[^"]*"|[^\s]+)   # arg="text" arg=variable
+''', re.VERBOSE)
+
+whitespace_re = re.compile(r'\s*')
+
+# Format: ``` OR {:.class}``` at the beginning of a line.
+code_block_start_re = re.compile(r'^(?:{:\s*[^}]+})?```', re.MULTILINE)
+
+
+def normalize(source):
+  # In a single linear scan:
+  #   - Removes HTML comments, with any surrounding whitespace collapsed
+  #     into a newline if there was any, or a space otherwise.
+  #   - Converts {% capture %}...{% endcapture %} into {% set %}...{% endset %}.
+  #   - Converts Jekyll includes with arguments into Jinja includes.
+  pieces = []
+  last = 0
+  captures = []  # (piece_index, name) of unclosed captures
+  pos = 0
+  while True:
+    start = token_start_re.search(source, pos)
+    if not start:
+      break
+    m = normalize_re.match(source, start.start())
+    if not m:
+      pos = start.start() + 1
+      continue
+    pos = m.end()
+    text = source[last:m.start()]
+    last = m.end()
+    if m['comment']:
+      stripped = text.rstrip()
+      end = whitespace_re.match(source, m.end()).end()
+      removed = source[m.start() - len(text) + len(stripped):end]
+      pieces.append(stripped)
+      pieces.append('\n' if '\n' in removed else ' ')
+      last = end
+    elif m['capture']:
+      pieces.append(text)
+      captures.append((len(pieces), m['name']))
+      pieces.append(m[0])
+    elif m['endcapture']:
+      pieces.append(text)
+      if captures:
+        # The first unclosed capture ends here, any captures
+        # inside of it are left as part of its body.
+        index, name = captures[0]
+        pieces[index] = '{{% set {} %}}'.format(name)
+        pieces.append('{% endset %}')
+        captures = []
+      else:
+        pieces.append(m[0])
+    elif m['include']:
+      pieces.append(text)
+      pieces.append(jekyll_liquid_include(m))
+  pieces.append(source[last:])
+  return normalize_inline_code_block(''.join(pieces).strip('\n'))
+
+
+def jekyll_liquid_include(m):
+  include_file = m['file'].strip('\'"')
+  args = [
+      '"{}": {}'.format(arg['name'], arg['value'])
+      for arg in jekyll_liquid_include_arg_re.finditer(m['args'])
+  ]
+  return (
+      '{{% with include={{{}}} %}}'
+      '{{% include "{}" %}}'
+      '{{% endwith %}}'
+  ).format(', '.join(args), include_file)
+
+
+def normalize_inline_code_block(source):
+  # Normalize inline code block finish backticks into next line, example:
+  # ```
+  # {% github_sample path/to/file tag:tag % }```
+  #
+  # A code block starts with ``` at the beginning of a line,
+  # and ends on the first ``` at the end of a line.
+  pieces = []
+  last = 0
+  pos = 0
+  while True:
+    m = code_block_start_re.search(source, pos)
+    if not m:
+      break
+    end = code_block_end(source, m.end())
+    if end < 0:
+      break
+    if end == m.end() or source[end - 1] != '\n':
+      pieces.append(source[last:end])
+      pieces.append('\n')
+      last = end
+    pos = end + 3
+  pieces.append(source[last:])
+  return ''.join(pieces)
+
+
+def code_block_end(source, start):
+  end = source.find('```', start)
+  while end >= 0:
+    if end + 3 == len(source) or source[end + 3] == '\n':
+      return end
+    end = source.find('```', end + 1)
+  return -1
@@ -17,13 +17,18 @@
 
 import jinja2
 import json
+import sys
 import tempfile
 import unittest
 
 from unittest.mock import patch
 
+from md2ipynb import testing
+
 from . import GithubSampleExt
 from . import MarkdownLoader
+from . import SourceCache
+from .markdown_loader import normalize
 
 expected_file = 'test/hello-expected.md'
 variables_file = 'test/hello-variables.json'
@@ -33,7 +38,17 @@ with open(expected_file) as f:
 with open(variables_file) as f:
   variables = json.load(f)
 
+# Created before setUpModule() patches the default retries.
 env = jinja2.Environment(loader=MarkdownLoader(), extensions=[GithubSampleExt])
+env.github_retries = 0
+
+
+def setUpModule():
+  testing.no_github_retries.start()
+
+
+def tearDownModule():
+  testing.no_github_retries.stop()
 
 
 def render_string(source, variables=None, env=env):
@@ -169,3 +184,89 @@ class MarkdownLoaderTest(unittest.TestCase):
         '{% include "test/include-argument.md" title=var %}',
     ]))
     self.assertEqual(expected, actual)
+
+
+class NormalizeTest(unittest.TestCase):
+  def test_normalize_comments(self):
+    expected = 'a b\nc\nd'
+    actual = normalize('\n<!-- start -->\na <!-- inline --> b <!--\n--> c  <!-- x -->\nd\n')
+    self.assertEqual(expected, actual)
+
+  def test_normalize_capture(self):
+    expected = '{% set a %}x {% capture b %}y{% endset %} {% endcapture %}'
+    actual = normalize('{% capture a %}x {% capture b %}y{% endcapture %} {% endcapture %}')
+    self.assertEqual(expected, actual)
+
+  def test_normalize_capture_unclosed(self):
+    expected = '{% endcapture %}{% capture a %}'
+    actual = normalize('{% endcapture %}{% capture a %}')
+    self.assertEqual(expected, actual)
+
+  def test_normalize_capture_with_comments_and_includes(self):
+    expected = (
+        '{% set a %}x '
+        '{% with include={"n": 1} %}{% include "file.md" %}{% endwith %}'
+        '{% endset %}'
+    )
+    actual = normalize(
+        '{% capture a %}x <!-- {% endcapture %} -->{% include file.md n=1 %}{% endcapture %}')
+    self.assertEqual(expected, actual)
+
+  def test_normalize_inline_code_block(self):
+    expected = '{: .py}```py\ncode\n```\n```\n```\ntext```'
+    actual = normalize('{: .py}```py\ncode```\n``````\ntext```')
+    self.assertEqual(expected, actual)
+
+
+class FastPathTest(unittest.TestCase):
+  def test_plain_markdown(self):
+    source = '\n\n# Title \u00e9\n\n\n\ntext > "quoted" {{ var }}\n```\ncode\n```\n\n'
+    with patch('html2md.convert', side_effect=AssertionError('converted')):
+      actual = MarkdownLoader().preprocess(source)
+    expected = MarkdownLoader(fast_path=False).preprocess(source)
+    self.assertEqual(expected, actual)
+
+  def test_html(self):
+    for source in ['<b>bold</b>', 'a &amp; b', 'a\r\nb']:
+      expected = MarkdownLoader(fast_path=False).preprocess(source)
+      actual = MarkdownLoader().preprocess(source)
+      self.assertEqual(expected, actual)
+
+
+class SourceCacheTest(unittest.TestCase):
+  def test_shared_by_environments(self):
+    cache = SourceCache()
+    with tempfile.NamedTemporaryFile('w') as f:
+      f.write('# {{ title }}')
+      f.flush()
+      for _ in range(3):
+        env = jinja2.Environment(loader=MarkdownLoader(source_cache=cache))
+        self.assertEqual('# Title', env.get_template(f.name).render(title='Title'))
+      self.assertEqual({'hits': 2, 'misses': 1}, {
+          name: value for name, value in cache.stats().items()
+          if name in ('hits', 'misses')
+      })
+
+  def test_modified_file(self):
+    cache = SourceCache()
+    loader = MarkdownLoader(source_cache=cache)
+    with tempfile.NamedTemporaryFile('w') as f:
+      f.write('before')
+      f.flush()
+      self.assertEqual('before', loader.get_source(env, f.name)[0])
+      f.write(' and after')
+      f.flush()
+      self.assertEqual('before and after', loader.get_source(env, f.name)[0])
+    self.assertEqual(0, cache.stats()['hits'])
+    self.assertEqual(1, cache.stats()['entries'])
+
+  def test_eviction(self):
+    cache = SourceCache(max_bytes=3 * sys.getsizeof('a' * 100))
+    for path in ['a', 'b', 'c']:
+      cache.put(path, 0, 0, path * 100)
+    cache.get('a', 0, 0)
+    cache.put('d', 0, 0, 'd' * 100)
+    self.assertEqual('a' * 100, cache.get('a', 0, 0))
+    self.assertIsNone(cache.get('b', 0, 0))
+    self.assertEqual('d' * 100, cache.get('d', 0, 0))
+    self.assertLessEqual(cache.size, cache.max_bytes)
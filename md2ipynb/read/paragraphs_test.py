@@ -15,8 +15,10 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import glob
 import unittest
 
+from md2ipynb import Span
 from md2ipynb import testing
 
 from . import paragraphs
@@ -65,3 +67,18 @@ class ParagraphsTest(unittest.TestCase):
         'test/classes-trailing-line.md',
         paragraphs)
     self.assertEqual(expected, actual)
+
+  def test_spans(self):
+    for input_file in sorted(glob.glob('test/*.md')):
+      with open(input_file) as f:
+        source = f.read()
+      # Skip the files that need a network connection or variables.
+      if 'github_sample' in source or 'include-argument' in input_file:
+        continue
+      expected = list(paragraphs(input_file))
+      actual = list(paragraphs(input_file, spans=True))
+      self.assertTrue(all(isinstance(span, Span) for span in actual), input_file)
+      self.assertEqual(expected, [span.text for span in actual], input_file)
+      self.assertEqual(
+          [paragraph.kind for paragraph in expected],
+          [span.kind for span in actual], input_file)
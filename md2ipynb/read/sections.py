@@ -18,11 +18,11 @@
 from . import paragraphs
 
 
-def sections(input_file='-', variables=None, include_dir=None, jinja_env=None, start_on_header=True):
+def sections(input_file='-', variables=None, include_dir=None, jinja_env=None, start_on_header=True, spans=False):
   header_found = False
   section = []
-  for paragraph in paragraphs(input_file, variables, include_dir, jinja_env):
-    if paragraph[0].startswith('#'):
+  for paragraph in paragraphs(input_file, variables, include_dir, jinja_env, spans):
+    if paragraph.startswith('#'):
       if section and (not start_on_header or header_found):
         yield section
       section = []
@@ -17,6 +17,8 @@
 
 import unittest
 
+from md2ipynb import Span
+
 from . import sections
 
 
@@ -58,3 +60,8 @@ class SectionsTest(unittest.TestCase):
         start_on_header=False,
     ))
     self.assertEqual(expected, actual)
+
+  def test_sections_spans(self):
+    actual = list(sections(['# H1', '', 'text', '', '## H2', '```', 'code', '```'], spans=True))
+    self.assertEqual([['# H1', 'text'], ['## H2', '```\ncode\n```']], actual)
+    self.assertTrue(all(isinstance(p, Span) for section in actual for p in section))
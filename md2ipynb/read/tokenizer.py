@@ -0,0 +1,159 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import re
+
+from md2ipynb.paragraph import CodeParagraph
+from md2ipynb.paragraph import HeaderParagraph
+from md2ipynb.paragraph import TextParagraph
+
+# Each paragraph is matched as a whole by a single pattern, so lines are
+# classified by the regex engine instead of one at a time in Python.
+# A line is classified as if its custom attributes {: #id .class} were
+# removed, like attributes_re.sub('', line) does. Lines that start with
+# any other character than '`', '#', '{' or a space can't be a code fence
+# or a header, so they only need to have their first character checked.
+# Every line matches only one of the alternatives for its kind of line,
+# so a failed match never backtracks through the ways to match a line.
+ATTRIBUTES = r'[^\S\n]*\{:[^}\n]*\}'
+FENCE_START = r'(?:{a})*`(?:{a})*`(?:{a})*`'.format(a=ATTRIBUTES)
+HEADER_START = r'(?:{a})*\#'.format(a=ATTRIBUTES)
+NOT_FENCE_OR_HEADER = r'(?!{}|{})'.format(FENCE_START, HEADER_START)
+
+FENCE_LINE = r'(?:```|(?!```)(?=[\s`{{]){})[^\n]*'.format(FENCE_START)
+HEADER_LINE = r'(?:\#|(?=[\s{{]){})[^\n]*'.format(HEADER_START)
+TEXT_LINE = r'(?:[^\s`#{{][^\n]*|(?![^\s`#{{]){}[^\n]+)'.format(
+    NOT_FENCE_OR_HEADER)
+# A line with only custom attributes after a header or a code block
+# goes with it, and so does a text line starting with them before it.
+ATTRIBUTES_LINE = r'(?:{})+(?![^\n])'.format(ATTRIBUTES)
+ATTRIBUTES_TEXT_LINE = r'(?=[\s{{]){}(?={})[^\n]+'.format(
+    NOT_FENCE_OR_HEADER, ATTRIBUTES)
+
+
+
+def repeat_lines(name, line, batch_size=1000):
+  # Like (?:\n{line})*, which matches as many lines as it can, but in
+  # atomic batches: each batch is matched in a lookahead, which never
+  # backtracks, and then consumed by a backreference to its named group.
+  # The regex engine keeps a backtracking state for each repetition, so
+  # this keeps its memory from growing with the number of lines.
+  # It's only the same when the lines that follow never need to be
+  # matched by fewer repetitions, like here where any following line
+  # can't be matched by `line`.
+  return r'(?:(?=(?P<{name}>(?:\n{line}){{1,{batch_size}}}))(?P={name}))*'.format(
+      name=name, line=line, batch_size=batch_size)
+
+
+CODE_LINE = r'(?:[^\s`{{][^\n]*|(?![^\s`{{])(?!{})[^\n]*)'.format(FENCE_START)
+CODE_BLOCK = r'{f}{c}(?:\n{f}(?:\n{a})?)?'.format(
+    f=FENCE_LINE, c=repeat_lines('block_lines', CODE_LINE), a=ATTRIBUTES_LINE)
+HEADER = r'{}(?:\n{})?'.format(HEADER_LINE, ATTRIBUTES_LINE)
+
+# The 'code' and 'header' groups only match the paragraphs that steps
+# treat as such: a header starts with '#', and a code block both starts
+# and ends with a ``` line. Any other paragraph is in the 'text' group,
+# including code blocks and headers with custom attributes around them.
+# Each match also includes the empty lines before the paragraph, and
+# the empty lines at the end are matched at once without a paragraph.
+paragraph_re = re.compile(
+    r'(?m)\n+\Z|(\n*)^(?:'
+    r'(?P<code>```[^\n]*(?:{c}\n```[^\n]*(?![^\n]|\n{a})|\n?\Z))|'
+    r'(?P<header>\#[^\n]*(?:\n{a})?)|'
+    r'(?P<text>(?:{at}\n)?{cb}|(?:{at}\n)?{h}|{t}{ts})'
+    r')'.format(
+        c=repeat_lines('code_lines', CODE_LINE), a=ATTRIBUTES_LINE,
+        at=ATTRIBUTES_TEXT_LINE, cb=CODE_BLOCK, h=HEADER, t=TEXT_LINE,
+        ts=repeat_lines('text_lines', TEXT_LINE)))
+
+# Lines are scanned in chunks of at least this many characters.
+CHUNK_SIZE = 1 << 16
+
+
+def chunked_scan(blocks, scan, chunk_size=CHUNK_SIZE):
+  # Like scan('\n'.join(blocks)), where each block is one or more '\n'
+  # joined lines, but only a chunk of the blocks is joined into a buffer
+  # at a time, so they can still be streamed.
+  # `scan(buffer)` returns a list with the paragraphs of the buffer, and
+  # the start of the last one. Yields (buffer, paragraphs) for each chunk.
+  #
+  # The last paragraph of a chunk might continue in the next lines, so
+  # it's scanned again along with them. Every match starts at the start
+  # of a paragraph, so this gives the same paragraphs.
+  # A paragraph longer than a chunk waits for as many new characters
+  # before it's scanned again, so it's only scanned a few times.
+  carry = None
+  pending = []
+  pending_size = 0
+  for block in blocks:
+    pending.append(block)
+    pending_size += len(block) + 1
+    if pending_size < max(chunk_size, len(carry or '')):
+      continue
+    buffer = '\n'.join(pending if carry is None else [carry] + pending)
+    paragraphs, last_start = scan(buffer)
+    if paragraphs:
+      yield buffer, paragraphs[:-1]
+    carry = buffer[last_start:] if paragraphs else None
+    pending = []
+    pending_size = 0
+
+  if carry is not None or pending:
+    buffer = '\n'.join(pending if carry is None else [carry] + pending)
+    yield buffer, scan(buffer)[0]
+
+
+def scan_paragraphs(buffer):
+  # Returns the paragraphs in a '\n' separated buffer, and the start of the
+  # last one. Each paragraph is created with the Paragraph class for the
+  # kind it matched, and its text is copied out of the buffer by the
+  # regex engine.
+  paragraphs = []
+  append = paragraphs.append
+  matches = paragraph_re.findall(buffer)
+  # The other groups are the empty lines before and the repeated lines.
+  for _, code, _, header, text, _, _ in matches:
+    if code:
+      append(CodeParagraph(code))
+    elif header:
+      append(HeaderParagraph(header))
+    elif text:
+      append(TextParagraph(text))
+  if not paragraphs:
+    return paragraphs, 0
+  # Only the empty lines at the end, which are the last match if there
+  # are any, can go after the last paragraph.
+  end = len(buffer) if any(matches[-1]) else len(buffer.rstrip('\n'))
+  return paragraphs, end - len(paragraphs[-1])
+
+
+def scan_bounds(buffer):
+  # Like scan_paragraphs(buffer), but with a (start, end, kind) tuple for
+  # each paragraph instead, without copying any text.
+  paragraphs = list(paragraph_bounds(buffer))
+  return paragraphs, paragraphs[-1][0] if paragraphs else 0
+
+
+def paragraph_bounds(buffer):
+  # Yields the (start, end, kind) of each paragraph in a '\n' separated
+  # buffer. Paragraphs are always contiguous lines, so each one is a
+  # single range.
+  for m in paragraph_re.finditer(buffer):
+    if m.lastgroup is None:
+      break
+    start, end = m.span(m.lastindex)
+    yield start, end, m.lastgroup
@@ -0,0 +1,179 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import random
+import tracemalloc
+import unittest
+
+from unittest.mock import Mock
+
+from md2ipynb.paragraph import CodeParagraph
+from md2ipynb.paragraph import HeaderParagraph
+from md2ipynb.paragraph import Paragraph
+from md2ipynb.paragraph import TextParagraph
+from md2ipynb.util import attributes_re
+
+from .tokenizer import chunked_scan
+from .tokenizer import paragraph_bounds
+from .tokenizer import scan_bounds
+from .tokenizer import scan_paragraphs
+
+
+def line_by_line_paragraphs(lines):
+  # The original line by line implementation of read.paragraphs().
+  is_paragraph_done = False
+  in_code_block = False
+  paragraph_lines = []
+  for raw_line in lines:
+    line = attributes_re.sub('', raw_line)
+    if is_paragraph_done:
+      is_paragraph_done = False
+      if paragraph_lines:
+        trailing_paragraph_class = raw_line and not line
+        if trailing_paragraph_class:
+          paragraph_lines.append(raw_line)
+        yield '\n'.join(paragraph_lines)
+        paragraph_lines = []
+        if trailing_paragraph_class:
+          continue
+    if in_code_block:
+      paragraph_lines.append(raw_line)
+      if line.startswith('```'):
+        in_code_block = False
+        is_paragraph_done = True
+    elif line.startswith('```') or line.startswith('#'):
+      in_code_block = line.startswith('```')
+      is_paragraph_done = not in_code_block
+      if len(paragraph_lines) == 1 and attributes_re.match(paragraph_lines[0]):
+        paragraph_lines.append(raw_line)
+      else:
+        if paragraph_lines:
+          yield '\n'.join(paragraph_lines)
+        paragraph_lines = [raw_line]
+    elif raw_line:
+      paragraph_lines.append(raw_line)
+    elif paragraph_lines:
+      yield '\n'.join(paragraph_lines)
+      paragraph_lines = []
+  if paragraph_lines:
+    yield '\n'.join(paragraph_lines)
+
+
+def tokenize(lines):
+  buffer = '\n'.join(lines)
+  return [buffer[start:end] for start, end, _ in paragraph_bounds(buffer)]
+
+
+def chunked(lines, chunk_size):
+  return [paragraph for _, paragraphs in chunked_scan(iter(lines), scan_paragraphs, chunk_size)
+          for paragraph in paragraphs]
+
+
+class TokenizerTest(unittest.TestCase):
+  def test_paragraph_bounds(self):
+    buffer = '# Title\ntext\nmore text\n\n```py\n# comment\n\ncode\n```\n{: .class}\nend\n\n```\ncode\n```\n\n'
+    self.assertEqual(
+        [(0, 7, 'header'), (8, 22, 'text'), (24, 60, 'text'), (61, 64, 'text'),
+         (66, 78, 'code')],
+        list(paragraph_bounds(buffer)))
+
+  def test_scan_paragraphs(self):
+    buffer = '\n# Title\ntext\n\n```\ncode\n```\n\n'
+    paragraphs, last_start = scan_paragraphs(buffer)
+    self.assertEqual(['# Title', 'text', '```\ncode\n```'], paragraphs)
+    self.assertEqual(
+        [HeaderParagraph, TextParagraph, CodeParagraph],
+        [type(paragraph) for paragraph in paragraphs])
+    self.assertEqual(15, last_start)
+    self.assertEqual((['text'], 0), scan_paragraphs('text\n\n'))
+    self.assertEqual((['```\n'], 1), scan_paragraphs('\n```\n'))
+    self.assertEqual(([], 0), scan_paragraphs('\n\n'))
+
+  def test_empty(self):
+    self.assertEqual([], tokenize([]))
+    self.assertEqual([], tokenize(['', '']))
+
+  def test_same_as_line_by_line(self):
+    # Attributes can also go between the backticks of a code fence.
+    pieces = ['text', 'more text', '# header', '```', '```py', '{: .class}',
+              'text {: #id}', '{: .a} {: .b}', '{: .a}```', '{: .a}# h', '',
+              '', '  ', '  {: .a}', '{: .a} text', '{: .a}  ', '`{: .a}``',
+              '` {: .a}`` x', ' #', '  code', '`code`', '{: a', '#']
+    rng = random.Random(0)
+    for _ in range(5000):
+      lines = [rng.choice(pieces) for _ in range(rng.randint(0, 20))]
+      expected = list(line_by_line_paragraphs(lines))
+      self.assertEqual(expected, tokenize(lines), lines)
+      buffer = '\n'.join(lines)
+      paragraphs, last_start = scan_paragraphs(buffer)
+      self.assertEqual(expected, paragraphs, lines)
+      self.assertEqual(
+          [Paragraph(text).kind for text in expected],
+          [paragraph.kind for paragraph in paragraphs], lines)
+      bounds, last_bounds_start = scan_bounds(buffer)
+      self.assertEqual(
+          [(paragraph.kind, paragraph) for paragraph in paragraphs],
+          [(kind, buffer[start:end]) for start, end, kind in bounds])
+      self.assertEqual(last_bounds_start, last_start)
+
+  def test_chunked(self):
+    pieces = ['text', '# header', '```', '```py', '{: .class}', 'text {: #id}',
+              '{: .a}```', '{: .a}# h', '', '', '  ']
+    rng = random.Random(0)
+    for _ in range(500):
+      lines = [rng.choice(pieces) for _ in range(rng.randint(0, 20))]
+      expected = tokenize(lines)
+      for chunk_size in [1, 5, 20, 1000]:
+        self.assertEqual(expected, chunked(lines, chunk_size), (lines, chunk_size))
+
+  def test_chunked_long_paragraph(self):
+    # A code block much longer than a chunk is only scanned a few times.
+    lines = ['```'] + ['code'] * 1000 + ['```', '', 'text']
+    scan = Mock(wraps=scan_paragraphs)
+    actual = [paragraph for _, paragraphs in chunked_scan(iter(lines), scan, 10)
+              for paragraph in paragraphs]
+    self.assertEqual(tokenize(lines), actual)
+    self.assertLess(scan.call_count, 15)
+
+  def test_trailing_empty_lines(self):
+    # The empty lines at the end are matched at once, not one at a time.
+    self.assertEqual(['text'], tokenize(['text'] + [''] * 100000))
+
+  def test_long_paragraphs(self):
+    # Lines are matched in batches, which must give the same paragraphs.
+    code = ['code {}'.format(i) for i in range(2500)]
+    for lines in [
+        ['```'] + code + ['```'],
+        ['{: .a}```'] + code + ['```', '{: .b}'],
+        ['```'] + code,
+        ['{: .a}```'] + code,
+        code,
+    ]:
+      self.assertEqual(list(line_by_line_paragraphs(lines)), tokenize(lines))
+      self.assertEqual(list(line_by_line_paragraphs(lines)), chunked(lines, 1000))
+
+  def test_long_code_block_memory(self):
+    # The regex engine's memory doesn't grow with the lines of a paragraph.
+    lines = ['```'] + ['code {}'.format(i) for i in range(100000)] + ['```']
+    buffer = '\n'.join(lines)
+    tracemalloc.start()
+    try:
+      self.assertEqual([(0, len(buffer), 'code')], list(paragraph_bounds(buffer)))
+      peak = tracemalloc.get_traced_memory()[1]
+    finally:
+      tracemalloc.stop()
+    self.assertLess(peak, len(buffer))
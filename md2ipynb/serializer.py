@@ -0,0 +1,255 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import concurrent.futures
+import json
+import logging
+
+import nbformat
+from nbformat.v4 import rwbase
+from nbformat.v4.nbjson import BytesEncoder
+
+from .cell import Cell
+from .cell import to_notebook_node
+
+encode_basestring = json.encoder.encode_basestring
+
+VALIDATE_MODES = ('always', 'sample', 'background', 'never')
+
+
+class Validator(object):
+  # Validates notebooks against the nbformat schema before writing them.
+  # Invalid notebooks are logged and still written, like nbformat does.
+  #   always: validate every notebook.
+  #   sample: only validate one of every `sample_every` notebooks.
+  #   background: validate in a worker thread, call wait() for the results.
+  #   never: don't validate.
+  def __init__(self, mode='always', sample_every=10):
+    if mode not in VALIDATE_MODES:
+      raise ValueError('invalid validate mode {}, expected one of: {}'.format(
+          repr(mode), ', '.join(VALIDATE_MODES)))
+    self.mode = mode
+    self.sample_every = max(sample_every, 1)
+    self.count = 0
+    self.invalid = 0
+    self._executor = None
+    self._pending = []
+
+  def __call__(self, notebook, name=None):
+    if self.start():
+      self.submit(notebook, name)
+
+  def start(self):
+    # Called once per notebook, returns whether to validate it.
+    self.count += 1
+    if self.mode == 'never':
+      return False
+    if self.mode == 'sample':
+      return (self.count - 1) % self.sample_every == 0
+    return True
+
+  def submit(self, node, name=None, ref=None):
+    # Validates a whole notebook, or with `ref` only a part of it,
+    # like a 'markdown_cell' or a 'code_cell'.
+    if self.mode != 'background':
+      return self.validate(node, name, ref)
+    if self._executor is None:
+      self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    self._pending.append(self._executor.submit(self.validate, node, name, ref))
+
+  def validate(self, node, name=None, ref=None):
+    try:
+      if ref is None:
+        nbformat.validate(to_notebook_node(node))
+      else:
+        nbformat.validate(node, ref=ref, version=nbformat.v4.nbformat,
+                          version_minor=nbformat.v4.nbformat_minor)
+      return True
+    except nbformat.ValidationError as e:
+      self.invalid += 1
+      logging.error('{}: notebook JSON is invalid: {}'.format(
+          name or '<notebook>', e))
+      return False
+
+  def wait(self):
+    # Waits for the background validations, returns how many notebooks
+    # were invalid so far.
+    for future in self._pending:
+      future.result()
+    self._pending = []
+    return self.invalid
+
+  def __getstate__(self):
+    # Worker processes get their own executor.
+    state = dict(self.__dict__)
+    state['_executor'] = None
+    state['_pending'] = []
+    return state
+
+
+def dumps(notebook, indent=1, validator=None, name=None):
+  # Same as nbformat.writes(notebook) for v4 notebooks with the default
+  # indent of 1. With indent=None, it's written in a single line.
+  return ''.join(iterencode(notebook, indent, validator, name))
+
+
+def dump(notebook, f, indent=1, validator=None, name=None):
+  # Same as nbformat.write(notebook, f), writing one cell at a time.
+  for chunk in iterencode(notebook, indent, validator, name):
+    f.write(chunk)
+  f.write('\n')
+
+
+def dump_cells(cells, f, metadata=None, indent=1, validator=None, name=None):
+  # Like dump(), but for a notebook that doesn't exist yet. Each cell is
+  # written as soon as it comes out of `cells`, so only one cell needs to
+  # be in memory at a time. The `metadata` can be a function, it's called
+  # after all the cells are written.
+  for chunk in iterencode_cells(cells, metadata, indent, validator, name):
+    f.write(chunk)
+  f.write('\n')
+
+
+def iterencode(notebook, indent=1, validator=None, name=None):
+  # Yields the notebook JSON in chunks: the opening, each cell,
+  # and the rest of the notebook.
+  (validator or Validator())(notebook, name)
+  return encode_fields(notebook, indent)
+
+
+def iterencode_cells(cells, metadata=None, indent=1, validator=None, name=None):
+  validator = validator or Validator()
+  fields = {
+      'cells': cells,
+      'metadata': metadata,
+      'nbformat': nbformat.v4.nbformat,
+      'nbformat_minor': nbformat.v4.nbformat_minor,
+  }
+  if not validator.start():
+    return encode_fields(fields, indent)
+
+  # Validate each cell, and then the notebook without its cells.
+  def validated_cells():
+    for cell in cells:
+      cell_dict = cell.to_dict() if isinstance(cell, Cell) else cell
+      validator.submit(cell_dict, name, '{}_cell'.format(cell_dict.get('cell_type')))
+      yield cell
+
+  def validated_metadata():
+    notebook = dict(fields, cells=[], metadata=metadata_value(metadata))
+    validator.submit(notebook, name)
+    return notebook['metadata']
+
+  return encode_fields(
+      dict(fields, cells=validated_cells(), metadata=validated_metadata), indent)
+
+
+def encode_fields(notebook, indent=1):
+  encode = pretty_encoder(indent) if indent is not None else compact_encode
+  separator = ': ' if indent is not None else ':'
+
+  def newline(level):
+    return '\n' + ' ' * (indent * level) if indent is not None else ''
+
+  # Keys are sorted, so 'cells' is always written before 'metadata'.
+  yield '{'
+  for i, key in enumerate(sorted(notebook)):
+    yield '{}{}{}{}'.format(',' if i else '', newline(1), json.dumps(key), separator)
+    if key == 'cells':
+      yield '['
+      has_cells = False
+      for j, cell in enumerate(notebook['cells']):
+        yield '{}{}{}'.format(',' if j else '', newline(2), encode(cell_json(cell), 2))
+        has_cells = True
+      yield '{}]'.format(newline(1) if has_cells else '')
+    elif key == 'metadata':
+      yield encode(notebook_metadata(metadata_value(notebook['metadata'])), 1)
+    else:
+      yield encode(notebook[key], 1)
+  yield '{}}}'.format(newline(0))
+
+
+def metadata_value(metadata):
+  if callable(metadata):
+    metadata = metadata()
+  return metadata or {}
+
+
+def compact_encode(value, level=0):
+  # Without indentation, json uses its C encoder.
+  return json.dumps(value, cls=BytesEncoder, sort_keys=True,
+                    ensure_ascii=False, separators=(',', ':'))
+
+
+def pretty_encoder(indent):
+  # Same output as json.dumps(value, indent=indent, sort_keys=True,
+  # separators=(',', ': '), ensure_ascii=False), but json only has
+  # a C encoder for unindented output. Notebooks are mostly lists of
+  # strings, so this encodes the strings in C and only walks the
+  # containers in Python.
+  def encode(value, level=0):
+    if isinstance(value, str):
+      return encode_basestring(value)
+    if isinstance(value, (list, tuple)):
+      if not value:
+        return '[]'
+      newline = '\n' + ' ' * (indent * (level + 1))
+      return '[{}{}\n{}]'.format(
+          newline,
+          (',' + newline).join([encode(item, level + 1) for item in value]),
+          ' ' * (indent * level))
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+      if not value:
+        return '{}'
+      newline = '\n' + ' ' * (indent * (level + 1))
+      return '{{{}{}\n{}}}'.format(
+          newline,
+          (',' + newline).join([
+              '{}: {}'.format(encode_basestring(key), encode(value[key], level + 1))
+              for key in sorted(value)]),
+          ' ' * (indent * level))
+    # Numbers, booleans, None, bytes and anything else.
+    text = json.dumps(value, cls=BytesEncoder, sort_keys=True, ensure_ascii=False,
+                      indent=indent, separators=(',', ': '))
+    return text.replace('\n', '\n' + ' ' * (indent * level))
+  return encode
+
+
+def notebook_metadata(metadata):
+  # Transient values that nbformat doesn't write.
+  return {key: value for key, value in metadata.items()
+          if key not in ('orig_nbformat', 'orig_nbformat_minor', 'signature')}
+
+
+def cell_json(cell):
+  # The cell as nbformat writes it, with the multiline strings
+  # split into lines, without copying the whole cell.
+  is_copy = isinstance(cell, Cell)
+  if is_copy:
+    cell = cell.to_dict()
+  if cell.get('outputs') or cell.get('attachments'):
+    # Rare in converted notebooks, let nbformat split them.
+    cell = rwbase.split_lines(nbformat.from_dict({'cells': [cell]})).cells[0]
+  else:
+    if not is_copy:
+      cell = dict(cell)
+    if isinstance(cell.get('source'), str):
+      cell['source'] = cell['source'].splitlines(True)
+  if 'trusted' in cell.get('metadata', {}):
+    cell['metadata'] = {key: value for key, value in cell['metadata'].items()
+                        if key != 'trusted'}
+  return cell
@@ -0,0 +1,133 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import glob
+import io
+import json
+import pickle
+import unittest
+
+import nbformat
+
+from . import serializer
+
+
+def full_notebook():
+  notebook = nbformat.v4.new_notebook(metadata={
+      'kernelspec': {'name': 'python3', 'display_name': 'python3'},
+      'signature': 'transient',
+      'numbers': [1, 2.5, None, True],
+  })
+  notebook.cells = [
+      nbformat.v4.new_markdown_cell('# Título\n\nSome "text"\twith tabs\n'),
+      nbformat.v4.new_code_cell(
+          'print(1)\nprint(2)',
+          metadata={'trusted': True, 'tags': ['a']},
+          outputs=[
+              nbformat.v4.new_output('stream', text='1\n2\n'),
+              nbformat.v4.new_output(
+                  'execute_result', {'text/plain': 'a\nb'}, execution_count=1),
+          ]),
+      nbformat.v4.new_markdown_cell(
+          '![image](attachment:a.png)',
+          attachments={'a.png': {'image/png': 'aGVsbG8=\n'}}),
+      nbformat.v4.new_code_cell(''),
+  ]
+  return notebook
+
+
+class SerializerTest(unittest.TestCase):
+  def test_same_as_nbformat(self):
+    notebooks = [nbformat.v4.new_notebook(), full_notebook()]
+    for path in sorted(glob.glob('examples/notebooks/*.ipynb')):
+      notebooks.append(nbformat.read(path, as_version=4))
+    for notebook in notebooks:
+      self.assertEqual(nbformat.writes(notebook), serializer.dumps(notebook))
+      expected, actual = io.StringIO(), io.StringIO()
+      nbformat.write(notebook, expected)
+      serializer.dump(notebook, actual)
+      self.assertEqual(expected.getvalue(), actual.getvalue())
+
+  def test_indent(self):
+    notebook = full_notebook()
+    expected = json.loads(nbformat.writes(notebook))
+    for indent in [None, 0, 2, 4]:
+      text = serializer.dumps(notebook, indent)
+      self.assertEqual(expected, json.loads(text), indent)
+    self.assertNotIn('\n', serializer.dumps(notebook, None))
+    self.assertIn('\n    "cells": [', serializer.dumps(notebook, 4))
+
+  def test_does_not_modify_notebook(self):
+    notebook = full_notebook()
+    expected = nbformat.from_dict(json.loads(json.dumps(notebook)))
+    serializer.dumps(notebook)
+    self.assertEqual(expected, notebook)
+
+  def test_validate(self):
+    invalid = nbformat.v4.new_notebook()
+    invalid.cells.append({'cell_type': 'invalid'})
+    with self.assertLogs(level='ERROR'):
+      serializer.dumps(invalid)
+
+    validator = serializer.Validator('never')
+    serializer.dumps(invalid, validator=validator)
+    self.assertEqual(0, validator.wait())
+
+    validator = serializer.Validator('sample', sample_every=3)
+    with self.assertLogs(level='ERROR'):
+      for _ in range(5):
+        serializer.dumps(invalid, validator=validator)
+    self.assertEqual(5, validator.count)
+    self.assertEqual(2, validator.wait())
+
+    validator = serializer.Validator('background')
+    with self.assertLogs(level='ERROR'):
+      serializer.dumps(invalid, validator=validator, name='invalid.ipynb')
+      self.assertEqual(1, validator.wait())
+    validator = pickle.loads(pickle.dumps(validator))
+    self.assertEqual(1, validator.wait())
+
+    with self.assertRaises(ValueError):
+      serializer.Validator('sometimes')
+
+  def test_dump_cells(self):
+    notebook = full_notebook()
+    del notebook.metadata['signature']
+    expected = io.StringIO()
+    nbformat.write(notebook, expected)
+
+    # The metadata is only needed after all the cells are written.
+    cells_written = []
+    def cells():
+      for cell in notebook.cells:
+        yield cell
+        cells_written.append(cell)
+    def metadata():
+      self.assertEqual(len(notebook.cells), len(cells_written))
+      return notebook.metadata
+    actual = io.StringIO()
+    serializer.dump_cells(cells(), actual, metadata)
+    self.assertEqual(expected.getvalue(), actual.getvalue())
+
+  def test_dump_cells_validate(self):
+    cells = [nbformat.v4.new_markdown_cell('valid'), {'cell_type': 'code'}]
+    with self.assertLogs(level='ERROR'):
+      serializer.dump_cells(cells, io.StringIO())
+    validator = serializer.Validator('background')
+    with self.assertLogs(level='ERROR'):
+      serializer.dump_cells(cells, io.StringIO(), validator=validator)
+      self.assertEqual(1, validator.wait())
@@ -19,5 +19,6 @@ from .flatten import flatten
 from .filter_classes import filter_classes
 from .imports import imports
 from .open_in_colab import open_in_colab
+from .parallel_map import parallel_map
 from .paragraphs_to_cells import paragraphs_to_cells
 from .view_the_docs import view_the_docs
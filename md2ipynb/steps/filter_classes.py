@@ -15,7 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 
-from md2ipynb import util
+from md2ipynb.paragraph import as_paragraph
 
 SHELLS = {'sh', 'bash'}
 
@@ -37,26 +37,29 @@ def filter_classes(paragraphs, keep_classes=None, force_filter=None):
     force_filter = set(force_filter)
 
   for paragraph in paragraphs:
+    paragraph = as_paragraph(paragraph)
+
     # Check for a paragraph class '{: .class}'.
-    attributes = util.parse_attributes(paragraph) or {}
+    attributes = paragraph.attributes or {}
     if 'class' in attributes:
       if force_filter and len(set(attributes['class']) & force_filter) > 0:
         continue
       if len(set(attributes['class']) & keep_classes) == 0:
         continue
-      paragraph = util.attributes_re.sub('', paragraph).strip('\n')
+      paragraph = paragraph.without_attributes()
 
     # Check for a code block '```class' both as 'class' and 'language-class'.
-    if paragraph.startswith('```') and paragraph.endswith('```'):
-      lines = paragraph.splitlines()
-      lang = lines[0].lstrip('`').strip()
+    lang = paragraph.lang
+    if lang is not None and paragraph.endswith('```'):
       possible_classes = {lang, 'language-' + lang, 'shell-' + lang}
       if lang and not keep_classes.intersection(possible_classes):
         continue
       if lang in SHELLS:
+        lines = paragraph.splitlines()
         for i in range(1, len(lines)-1):
           lines[i] = '!' + lines[i]
-        paragraph = '\n'.join(lines)
+        # Adding the '!' doesn't change the paragraph's kind.
+        paragraph = type(paragraph)('\n'.join(lines))
 
     # If we're still here and the paragraph is not empty, yield it.
     if paragraph:
@@ -18,6 +18,7 @@
 import unittest
 
 import md2ipynb
+from md2ipynb import Span
 from md2ipynb import testing
 
 from . import filter_classes
@@ -210,3 +211,16 @@ class FilterClassesTest(unittest.TestCase):
         force_filter='classB',
     ))
     self.assertEqual(expected, actual)
+
+  def test_spans(self):
+    buffer = '{:.classA}\n```py\ncode\n```\n\n{:.classB}\nclassB\n\n```sh\nls\n```'
+    paragraphs = list(md2ipynb.read.paragraphs([buffer], spans=True))
+    actual = list(filter_classes(paragraphs, keep_classes=['classA', 'language-py']))
+    self.assertEqual(['```py\ncode\n```'], actual)
+    # Spans only need their attributes left out, without copying their text.
+    self.assertIsInstance(actual[0], Span)
+    self.assertIs(paragraphs[0].buffer, actual[0].buffer)
+    self.assertEqual('code', actual[0].kind)
+    # Shell commands are changed, so they're copied.
+    actual = list(filter_classes(paragraphs, keep_classes=['shell-sh']))
+    self.assertEqual(['```sh\n!ls\n```'], actual)
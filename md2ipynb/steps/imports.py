@@ -15,36 +15,48 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import collections
 import jinja2
 
 from md2ipynb import read
 
 
 def imports(sections, imports=None, variables=None, include_dir=None, jinja_env=None):
-  def sections_from_imports(import_index):
-    for input_file in imports[import_index]:
-      for import_section in read.sections(input_file, variables, include_dir, jinja_env):
+  # Imports are given as `{index: [file1, file2, ...]}`, where a negative
+  # index counts from the end, so -1 imports the files after the last section.
+  imports = imports or {}
+
+  def imports_at(index, remaining=None):
+    # The files to import before the section at `index`, which has
+    # `remaining` sections from it until the end, if known.
+    for import_index, input_files in imports.items():
+      if import_index < 0 and remaining is not None:
+        matches = import_index == -remaining - 1
+      else:
+        matches = import_index == index
+      if matches:
+        for input_file in input_files:
+          for import_section in read.sections(input_file, variables, include_dir, jinja_env):
+            yield import_section
+
+  # Sections are streamed, only holding back as many as needed to know
+  # where the imports with a negative index go, none for -1.
+  lookahead = max([-index - 1 for index in imports if index < 0] + [0])
+  pending = collections.deque()
+  i = 0
+  for section in sections:
+    pending.append(section)
+    if len(pending) > lookahead:
+      for import_section in imports_at(i):
         yield import_section
+      yield pending.popleft()
+      i += 1
 
-  sections = list(sections)
-  if imports is None:
-    imports = {}
-
-  # Normalize imports to the form: `{non_negative_index: [file1, file2, ...]}`.
-  for index, input_file in imports.items():
-    if index < 0:
-      imports[len(sections)+index+1] = input_file
-      del imports[index]
-
-  # Iterate over all the sections, inserting any imports if needed.
-  for i, section in enumerate(sections):
-    if i in imports:
-      for import_section in sections_from_imports(i):
-        yield import_section
-    yield section
-
-  # Include imports that go at the end.
-  i = len(sections)
-  if i in imports:
-    for import_section in sections_from_imports(i):
+  # The last sections, and then the imports that go at the end.
+  while pending:
+    for import_section in imports_at(i, len(pending)):
       yield import_section
+    yield pending.popleft()
+    i += 1
+  for import_section in imports_at(i, 0):
+    yield import_section
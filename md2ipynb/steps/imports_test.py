@@ -71,3 +71,26 @@ class ImportsTest(unittest.TestCase):
         variables={'title': 'Title'},
     ))
     self.assertEqual(expected, actual)
+
+  def test_imports_negative(self):
+    sections = [['# section {}'.format(i)] for i in range(3)]
+    for index, position in [(-1, 3), (-2, 2), (-3, 1), (-4, 0), (-5, None)]:
+      expected = list(sections)
+      if position is not None:
+        expected.insert(position, ['# import'])
+      actual = list(imports(
+          sections=iter(sections), imports={index: [['# import']]}))
+      self.assertEqual(expected, actual, index)
+
+  def test_imports_streamed(self):
+    read_sections = []
+    def sections():
+      for i in range(3):
+        read_sections.append(i)
+        yield ['# section {}'.format(i)]
+    actual = imports(sections(), {0: [['# start']], -1: [['# end']]})
+    self.assertEqual(['# start'], next(actual))
+    self.assertEqual(['# section 0'], next(actual))
+    self.assertEqual([0], read_sections)
+    self.assertEqual(['# section 1'], next(actual))
+    self.assertEqual([0, 1], read_sections)
@@ -15,7 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import nbformat
+from md2ipynb.cell import markdown_cell
 
 
 def open_in_colab(cells, ipynb_github_url=None, **kwargs):
@@ -24,11 +24,11 @@ def open_in_colab(cells, ipynb_github_url=None, **kwargs):
       ipynb_github_url = ipynb_github_url[len('https://'):]
     if ipynb_github_url.startswith('github.com/'):
       ipynb_github_url = ipynb_github_url[len('github.com/'):]
-    yield nbformat.v4.new_markdown_cell(
+    yield markdown_cell(
         '<a href="https://colab.research.google.com/github/{}" target="_parent">'
           '<img src="https://colab.research.google.com/assets/colab-badge.svg" alt="Open in Colab"/>'
         '</a>'.format(ipynb_github_url),
-        metadata={'id': 'view-in-github'},
+        'view-in-github',
     )
 
   for cell in cells:
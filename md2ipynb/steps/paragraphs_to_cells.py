@@ -15,9 +15,14 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import nbformat
 import re
 
+from md2ipynb.cell import FORM_VIEW_METADATA
+from md2ipynb.cell import NO_METADATA
+from md2ipynb.cell import code_cell
+from md2ipynb.cell import markdown_cell
+from md2ipynb.paragraph import as_paragraph
+
 invalid_cell_id_chars = re.compile(r'[^\w]+')
 
 
@@ -41,37 +46,26 @@ def paragraphs_to_cells(paragraphs):
   last_header = '_'
   contents = []
   for paragraph in paragraphs:
-    lines = paragraph.splitlines()
-    if not lines:
+    paragraph = as_paragraph(paragraph)
+    if not paragraph:
       continue
 
-    if lines[0].startswith('#'):
+    kind = paragraph.kind
+    if kind == 'header':
       if contents:
-        yield nbformat.v4.new_markdown_cell(
-            source='\n\n'.join(contents),
-            metadata={'id': cell_id(last_header)},
-        )
-      contents = [paragraph]
-      last_header = lines[0].lstrip('#').strip()
-    elif lines[0].startswith('```') and lines[-1].startswith('```'):
+        yield markdown_cell('\n\n'.join(contents), cell_id(last_header))
+      contents = [paragraph.text]
+      last_header = paragraph.first_line.lstrip('#').strip()
+    elif kind == 'code':
       if contents:
-        yield nbformat.v4.new_markdown_cell(
-            source='\n\n'.join(contents),
-            metadata={'id': cell_id(last_header)},
-        )
+        yield markdown_cell('\n\n'.join(contents), cell_id(last_header))
         contents = []
-      source = '\n'.join(lines[1:-1])
-      metadata={'id': cell_id(last_header + '-code')}
+      source = paragraph.code
+      metadata_template = NO_METADATA
       if '#@title' in source or '#@param' in source:
-        metadata.update({'cellView': 'form'})
-      yield nbformat.v4.new_code_cell(
-          source=source,
-          metadata=metadata,
-      )
+        metadata_template = FORM_VIEW_METADATA
+      yield code_cell(source, cell_id(last_header + '-code'), metadata_template)
     else:
-      contents.append(paragraph)
+      contents.append(paragraph.text)
   if contents:
-    yield nbformat.v4.new_markdown_cell(
-        source='\n\n'.join(contents),
-        metadata={'id': cell_id(last_header)},
-    )
\ No newline at end of file
+    yield markdown_cell('\n\n'.join(contents), cell_id(last_header))
\ No newline at end of file
@@ -18,6 +18,8 @@
 import nbformat
 import unittest
 
+from md2ipynb import Span
+
 from . import paragraphs_to_cells
 
 
@@ -108,3 +110,15 @@ class ParagraphsToCellsTest(unittest.TestCase):
         '```\nx = 42 #@param\n```',
     ]))
     self.assertEqual(expected, actual)
+
+  def test_spans(self):
+    buffer = '# Title\n\ntext\n\n```py\nline 1\nline 2\n```\n\n```\n```'
+    paragraphs = [Span(buffer, 0, 7), Span(buffer, 9, 13), Span(buffer, 15, 38),
+                  Span(buffer, 40, 47)]
+    def parts(cells):
+      # Each cell has a random 'id'.
+      return [(cell.cell_type, cell.source, cell.metadata) for cell in cells]
+    expected = parts(paragraphs_to_cells([p.text for p in paragraphs]))
+    actual = parts(paragraphs_to_cells(paragraphs))
+    self.assertEqual(expected, actual)
+    self.assertEqual('line 1\nline 2', actual[1][1])
@@ -0,0 +1,66 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import collections
+import concurrent.futures
+import itertools
+import os
+
+
+def parallel_map(items, fn, workers=None, chunk_size=1, processes=False, max_pending=None):
+  # Yields fn(item) for every item in the same order, running fn on a thread
+  # pool, or a process pool if `processes` is True (fn must be picklable).
+  # Items are sent in chunks of `chunk_size`, and at most `max_pending`
+  # chunks are in flight, so only a bounded number of items is in memory.
+  # Invalid options are raised on the call, not when the items are read.
+  if chunk_size < 1:
+    raise ValueError('chunk_size must be at least 1, got {}'.format(chunk_size))
+  if max_pending is not None and max_pending < 1:
+    raise ValueError('max_pending must be at least 1, got {}'.format(max_pending))
+  workers = workers or os.cpu_count() or 1
+  return map_chunks(items, fn, workers, chunk_size, processes,
+                    max_pending or 2 * workers)
+
+
+def map_chunks(items, fn, workers, chunk_size, processes, max_pending):
+  if processes:
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+  else:
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+  pending = collections.deque()
+  try:
+    items = iter(items)
+    while True:
+      chunk = list(itertools.islice(items, chunk_size))
+      if not chunk:
+        break
+      pending.append(executor.submit(map_chunk, fn, chunk))
+      if len(pending) >= max_pending:
+        for result in pending.popleft().result():
+          yield result
+    while pending:
+      for result in pending.popleft().result():
+        yield result
+  finally:
+    for future in pending:
+      future.cancel()
+    executor.shutdown()
+
+
+def map_chunk(fn, chunk):
+  return [fn(item) for item in chunk]
@@ -0,0 +1,73 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import random
+import time
+import unittest
+
+from . import parallel_map
+
+
+def upper(paragraph):
+  return paragraph.upper()
+
+
+def sleep_upper(paragraph):
+  time.sleep(random.random() / 100)
+  return paragraph.upper()
+
+
+class ParallelMapTest(unittest.TestCase):
+  def test_parallel_map(self):
+    paragraphs = ['paragraph {}'.format(i) for i in range(50)]
+    expected = [paragraph.upper() for paragraph in paragraphs]
+    for chunk_size in [1, 3, 100]:
+      actual = list(parallel_map(paragraphs, sleep_upper, 4, chunk_size))
+      self.assertEqual(expected, actual)
+
+  def test_parallel_map_empty(self):
+    self.assertEqual([], list(parallel_map([], upper)))
+
+  def test_parallel_map_invalid_options(self):
+    for chunk_size in [0, -1]:
+      with self.assertRaises(ValueError):
+        parallel_map(['a', 'b', 'c'], upper, 2, chunk_size)
+    with self.assertRaises(ValueError):
+      parallel_map(['a', 'b', 'c'], upper, 2, max_pending=0)
+
+  def test_parallel_map_processes(self):
+    expected = ['A', 'B', 'C']
+    actual = list(parallel_map(['a', 'b', 'c'], upper, 2, processes=True))
+    self.assertEqual(expected, actual)
+
+  def test_parallel_map_bounded(self):
+    consumed = []
+    def paragraphs():
+      for i in range(1000):
+        consumed.append(i)
+        yield str(i)
+
+    outputs = parallel_map(paragraphs(), upper, workers=2, chunk_size=5, max_pending=3)
+    self.assertEqual('0', next(outputs))
+    self.assertLessEqual(len(consumed), 3 * 5 + 1)
+    outputs.close()
+
+  def test_parallel_map_error(self):
+    def fail(paragraph):
+      raise ValueError(paragraph)
+    with self.assertRaises(ValueError):
+      list(parallel_map(['a'], fail))
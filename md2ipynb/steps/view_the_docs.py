@@ -15,7 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 
-import nbformat
+from md2ipynb.cell import markdown_cell
 
 
 def view_the_docs(cells, docs_url=None, docs_logo_url=None):
@@ -34,16 +34,10 @@ def view_the_docs(cells, docs_url=None, docs_logo_url=None):
         '</table>'
     ).format(docs_url, docs_logo_html)
 
-    yield nbformat.v4.new_markdown_cell(
-        source=view_the_docs_html,
-        metadata={'id': 'view-the-docs-top'},
-    )
+    yield markdown_cell(view_the_docs_html, 'view-the-docs-top')
 
   for cell in cells:
     yield cell
 
   if docs_url:
-    yield nbformat.v4.new_markdown_cell(
-        source=view_the_docs_html,
-        metadata={'id': 'view-the-docs-bottom'},
-    )
+    yield markdown_cell(view_the_docs_html, 'view-the-docs-bottom')
@@ -15,6 +15,16 @@
 # specific language governing permissions and limitations
 # under the License.
 
+from unittest import mock
+
+from md2ipynb.read import http_session
+
+# Without network access, every {% github_sample %} would be retried with
+# a backoff. Tests that render samples start this in setUpModule() and
+# stop it in tearDownModule().
+no_github_retries = mock.patch.object(http_session, 'DEFAULT_RETRIES', 0)
+
+
 def compare_files(test_file, expected_file, paragraphs_fn):
   with open(expected_file) as f:
     expected = f.read().rstrip()
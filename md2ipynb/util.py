@@ -15,8 +15,12 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import hashlib
 import logging
+import os
 import re
+import stat
+import tempfile
 
 # Format: {: #id .class attrib1='value' attrib2="value" }
 attributes_re = re.compile(r'\s*{:(?P<attributes>[^}]*)}\n*')
@@ -27,8 +31,22 @@ attrib_re = re.compile(r'''^(?:
 )$''', re.VERBOSE)
 
 
-def parse_attributes(line):
-  m = attributes_re.search(line)
+def current_umask():
+  # The umask can only be read by setting it, which is process-wide.
+  umask = os.umask(0)
+  os.umask(umask)
+  return umask
+
+
+# The mode open(path, 'w') gives new files. The umask is read once on
+# import, since changing it while other threads create files would
+# give them the wrong mode.
+NEW_FILE_MODE = 0o666 & ~current_umask()
+
+
+def parse_attributes(line, start=0, end=None):
+  # Parses the first attributes in line[start:end], without copying it.
+  m = attributes_re.search(line, start, len(line) if end is None else end)
   if not m:
     return None
 
@@ -50,3 +68,77 @@ def parse_attributes(line):
       result[m['key']] = m['value']
 
   return result
+
+
+def write_atomic(path, contents, skip_unchanged=False):
+  # Write to a temporary file and rename it so concurrent processes
+  # never see a partially written file. Returns whether it was written.
+  with AtomicFile(path, skip_unchanged) as f:
+    f.write(contents)
+  return f.changed
+
+
+def open_atomic(path, skip_unchanged=False):
+  return AtomicFile(path, skip_unchanged)
+
+
+class AtomicFile(object):
+  # Like open(path, 'w'), but the file is written into a temporary file
+  # that replaces `path` only if the block finishes without errors.
+  # With `skip_unchanged`, `path` is left untouched if it already has the
+  # same contents, so its mtime doesn't change. `changed` tells whether
+  # `path` was replaced.
+  def __init__(self, path, skip_unchanged=False):
+    self.path = path
+    self.skip_unchanged = skip_unchanged
+    self.changed = None
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    fd, self.temp_path = tempfile.mkstemp(dir=directory or None, prefix='.tmp-')
+    self.file = os.fdopen(fd, 'w', encoding='utf-8')
+
+  def write(self, text):
+    return self.file.write(text)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    try:
+      self.file.close()
+      if exc_type is None:
+        self._commit()
+    finally:
+      if os.path.exists(self.temp_path):
+        os.remove(self.temp_path)
+
+  def _commit(self):
+    if self.skip_unchanged and same_contents(self.temp_path, self.path):
+      self.changed = False
+      return
+    # Temporary files are only readable by their owner.
+    try:
+      mode = stat.S_IMODE(os.stat(self.path).st_mode)
+    except OSError:
+      mode = NEW_FILE_MODE
+    os.chmod(self.temp_path, mode)
+    os.replace(self.temp_path, self.path)
+    self.changed = True
+
+
+def same_contents(path, other_path):
+  try:
+    if os.path.getsize(path) != os.path.getsize(other_path):
+      return False
+    return file_sha256(path) == file_sha256(other_path)
+  except OSError:
+    return False
+
+
+def file_sha256(path):
+  sha256 = hashlib.sha256()
+  with open(path, 'rb') as f:
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+      sha256.update(chunk)
+  return sha256.hexdigest()
@@ -15,6 +15,9 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import os
+import stat
+import tempfile
 import unittest
 
 from . import util
@@ -65,3 +68,27 @@ class UtilTest(unittest.TestCase):
     expected = {'id': 'tag-id', 'class': ['class-A'], 'a': 'A'}
     actual = util.parse_attributes('{:#tag-id .class-A a="A"}')
     self.assertEqual(expected, actual)
+
+  def test_write_atomic(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      path = os.path.join(temp_dir, 'nested', 'file.txt')
+      self.assertTrue(util.write_atomic(path, 'hello'))
+      self.assertEqual(util.NEW_FILE_MODE, stat.S_IMODE(os.stat(path).st_mode))
+      os.chmod(path, 0o640)
+      os.utime(path, (0, 0))
+
+      self.assertFalse(util.write_atomic(path, 'hello', skip_unchanged=True))
+      self.assertEqual(0, os.path.getmtime(path))
+      self.assertTrue(util.write_atomic(path, 'hello!', skip_unchanged=True))
+      self.assertEqual(0o640, stat.S_IMODE(os.stat(path).st_mode))
+      with open(path) as f:
+        self.assertEqual('hello!', f.read())
+
+      # A failed write leaves the file as it was, without temporary files.
+      with self.assertRaises(RuntimeError):
+        with util.open_atomic(path) as f:
+          f.write('partial')
+          raise RuntimeError('failed')
+      with open(path) as f:
+        self.assertEqual('hello!', f.read())
+      self.assertEqual(['file.txt'], os.listdir(os.path.dirname(path)))
@@ -0,0 +1,139 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import os
+import sys
+import time
+import traceback
+
+from . import batch
+from . import read
+from .read import dependencies
+from .read import github_sample
+
+
+class Watcher(object):
+  # Converts all the jobs, and then only reconverts the notebooks whose
+  # page, includes, imports or github samples changed. Everything runs in
+  # this process, so the Jinja environment and its caches stay warm.
+  def __init__(self, jobs, jinja_env=None, github_interval=None, **kwargs):
+    self.jobs = list(jobs)
+    self.jinja_env = jinja_env or read.new_jinja_env(kwargs.get('include_dir'))
+    self.github_interval = github_interval
+    self.kwargs = kwargs
+    self.dependencies = {}
+    self.stats = {}
+    self._next_github_check = None
+
+  def build(self, jobs=None):
+    results = []
+    for job in self.jobs if jobs is None else jobs:
+      input_file, output_file = job
+      with dependencies.record() as job_dependencies:
+        dependencies.add_file(input_file)
+        try:
+          changed = batch.convert(
+              input_file, output_file, jinja_env=self.jinja_env, **self.kwargs)
+          results.append(batch.Result(input_file, output_file, None, changed))
+        except Exception:
+          results.append(
+              batch.Result(input_file, output_file, traceback.format_exc()))
+      self.dependencies[job] = job_dependencies
+      for path in job_dependencies.files:
+        if path not in self.stats:
+          self.stats[path] = file_stat(path)
+    if self.github_interval:
+      self._next_github_check = time.time() + self.github_interval
+    return batch._report(results)
+
+  def changes(self):
+    # Returns the files and github URLs that changed since the last call.
+    return self.changed_files() | self.changed_urls()
+
+  def changed_files(self):
+    changed = set()
+    for path, stat in self.stats.items():
+      new_stat = file_stat(path)
+      if new_stat != stat:
+        self.stats[path] = new_stat
+        changed.add(path)
+    return changed
+
+  def changed_urls(self):
+    # Github samples can't be watched, so they're downloaded again every
+    # `github_interval` seconds, revalidating with the github cache if any.
+    if not self.github_interval or time.time() < self._next_github_check:
+      return set()
+    self._next_github_check = time.time() + self.github_interval
+
+    urls = {}
+    for job_dependencies in self.dependencies.values():
+      urls.update(job_dependencies.urls)
+    github_cache = getattr(self.jinja_env, 'github_cache', None)
+    get = github_sample.http_get(self.jinja_env)
+    changed = set()
+    for url, branch in sorted(urls.items()):
+      try:
+        github_file = github_sample.fetch(url, branch, github_cache, get)
+      except Exception as e:
+        print('failed to check {}: {}'.format(url, e), file=sys.stderr)
+        continue
+      if github_sample.github_file_cache.get(url) != github_file:
+        github_sample.github_file_cache[url] = github_file
+        changed.add(url)
+    return changed
+
+  def affected_jobs(self, changed):
+    jobs = []
+    for job in self.jobs:
+      job_dependencies = self.dependencies.get(job)
+      if job_dependencies is None or not changed.isdisjoint(
+          job_dependencies.files) or not changed.isdisjoint(job_dependencies.urls):
+        jobs.append(job)
+    return jobs
+
+  def poll(self):
+    # Reconverts the notebooks affected by any changes, returns their results.
+    changed = self.changes()
+    if not changed:
+      return []
+    return self.build(self.affected_jobs(changed))
+
+  def run(self, interval=1.0, f=None):
+    f = f or sys.stderr
+    batch.write_summary(self.build(), f=f)
+    print('Watching for changes, press Ctrl+C to stop.', file=f)
+    try:
+      while True:
+        time.sleep(interval)
+        changed = self.changes()
+        jobs = self.affected_jobs(changed) if changed else []
+        if jobs:
+          for path in sorted(changed):
+            print('Changed: {}'.format(path), file=f)
+          batch.write_summary(self.build(jobs), f=f)
+    except KeyboardInterrupt:
+      pass
+
+
+def file_stat(path):
+  # Missing files are tracked too, creating them is also a change.
+  try:
+    stat = os.stat(path)
+  except OSError:
+    return None
+  return (stat.st_mtime_ns, stat.st_size)
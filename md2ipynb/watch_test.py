@@ -0,0 +1,77 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements. See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership. The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License. You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from . import watch
+
+
+def write(path, source, mtime):
+  with open(path, 'w') as f:
+    f.write(source)
+  os.utime(path, (mtime, mtime))
+
+
+class WatcherTest(unittest.TestCase):
+  def test_rebuild_affected(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      def path(name):
+        return os.path.join(temp_dir, name)
+
+      write(path('a.md'), '# A\n\n{% include "shared.md" %}', 1)
+      write(path('b.md'), '# B', 1)
+      write(path('shared.md'), 'Shared', 1)
+      jobs = [
+          (path('a.md'), path('a.ipynb')),
+          (path('b.md'), path('b.ipynb')),
+      ]
+      watcher = watch.Watcher(jobs, include_dir=temp_dir)
+      results = watcher.build()
+      self.assertEqual([None, None], [result.error for result in results])
+      self.assertEqual([], watcher.poll())
+
+      # Only the notebook including the changed file is converted again.
+      write(path('shared.md'), 'Changed', 2)
+      results = watcher.poll()
+      self.assertEqual([path('a.md')], [result.input_file for result in results])
+      with open(path('a.ipynb')) as f:
+        notebook = json.load(f)
+      self.assertEqual('# A\n\nChanged', ''.join(notebook['cells'][0]['source']))
+      self.assertEqual([], watcher.poll())
+
+      write(path('b.md'), '# B changed', 3)
+      results = watcher.poll()
+      self.assertEqual([path('b.md')], [result.input_file for result in results])
+
+  def test_missing_include(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      page = os.path.join(temp_dir, 'page.md')
+      write(page, '{% include "missing.md" %}', 1)
+      watcher = watch.Watcher(
+          [(page, os.path.join(temp_dir, 'page.ipynb'))], include_dir=temp_dir)
+      with self.assertLogs(level='ERROR'):
+        results = watcher.build()
+      self.assertIsNotNone(results[0].error)
+
+      # Creating the missing include fixes the notebook.
+      write(os.path.join(temp_dir, 'missing.md'), 'Found', 1)
+      results = watcher.poll()
+      self.assertEqual([None], [result.error for result in results])
+
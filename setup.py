@@ -23,9 +23,14 @@ with open("README.md") as f:
 with open('requirements.txt') as f:
   requirements = f.read().splitlines()
 
+# Read the version without importing the package and its dependencies.
+version = {}
+with open('md2ipynb/version.py') as f:
+  exec(f.read(), version)
+
 setuptools.setup(
     name="md2ipynb",
-    version="0.2.1",
+    version=version['__version__'],
     author="David Cavazos",
     author_email="dcavazosw@gmail.com",
     description="Markdown to Jupyter Notebook converter.",
@@ -38,7 +43,8 @@ setuptools.setup(
     tests_require=['nose'],
     entry_points={
         'console_scripts': [
-            'md2ipynb = md2ipynb.__main__:main'
+            'md2ipynb = md2ipynb.__main__:main',
+            'md2ipynb-github-cache = md2ipynb.read.github_cache:main',
         ],
     },
     classifiers=[